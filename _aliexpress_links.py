@@ -0,0 +1,12 @@
+#!/usr/bin/env python3
+"""
+Shared checks on links returned by the AliExpress affiliate API
+"""
+
+# Query parameter that marks a search-results link rather than a product page
+_SEARCH_TEXT = 'SearchText'
+
+def is_search_link(link):
+    """True if the link carries SearchText in its query string"""
+    # The marker only ever appears after '?', so skip scanning the host and path
+    return link.find(_SEARCH_TEXT, link.find('?') + 1) != -1
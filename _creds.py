@@ -0,0 +1,20 @@
+#!/usr/bin/env python3
+"""
+Shared AliExpress API credentials for the test scripts
+Loads the .env file once per process, however many scripts import it
+"""
+
+import os
+from functools import lru_cache
+from dotenv import load_dotenv
+
+@lru_cache(maxsize=None)
+def get_creds():
+    """Return (API_KEY, SECRET_KEY, TRACKING_ID) from the environment"""
+    # Load environment variables
+    load_dotenv()
+
+    api_key = os.getenv('AFFILIATE_API_KEY') or os.getenv('ALIBABA_API_KEY') or os.getenv('ALIEXPRESS_API_KEY')
+    secret_key = os.getenv('AFFILIATE_SECRET_KEY') or os.getenv('ALIBABA_SECRET_KEY') or os.getenv('ALIEXPRESS_SECRET_KEY')
+    tracking_id = os.getenv('TRACKING_ID', 'bargainbliss_ai_bot')  # Use human-readable tracking ID
+    return api_key, secret_key, tracking_id
@@ -0,0 +1,22 @@
+#!/usr/bin/env python3
+"""
+JSON helpers for the test scripts
+Uses orjson when it is installed and falls back to the stdlib json module
+"""
+
+try:
+    import orjson
+
+    def dumps(obj, indent=None):
+        """Serialize obj to a str; orjson only supports 2-space indentation"""
+        option = orjson.OPT_INDENT_2 if indent else 0
+        return orjson.dumps(obj, option=option).decode()
+
+    def loads(s):
+        """Parse JSON from str or bytes"""
+        return orjson.loads(s)
+except ImportError:  # Fall back to the stdlib json module when orjson isn't installed
+    import json
+
+    dumps = json.dumps
+    loads = json.loads
@@ -0,0 +1,22 @@
+#!/usr/bin/env python3
+"""
+Shared requests session setup for the test scripts
+"""
+
+import atexit
+import requests
+from requests.adapters import HTTPAdapter
+
+def make_session(pool_connections=10, pool_maxsize=10, max_retries=0):
+    """Return a requests Session whose HTTPS connections are pooled and closed at exit
+
+    Reusing the session keeps the TLS connection to the API open between requests.
+    """
+    session = requests.Session()
+    session.mount('https://', HTTPAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        max_retries=max_retries
+    ))
+    atexit.register(session.close)
+    return session
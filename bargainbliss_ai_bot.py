@@ -21,11 +21,12 @@ import re
 import json
 import secrets
 from urllib.parse import urlparse
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
 from dotenv import load_dotenv
 from telegram.ext import Application, CommandHandler, MessageHandler, filters, ContextTypes
 from telegram import Update
 from message_manager import message_manager
+from _aliexpress_sign import now_ts_str
 from aiohttp import web
 import threading
 
@@ -80,6 +81,11 @@ class RateLimiter:
 
 rate_limiter = RateLimiter()
 
+# Product page paths
+_PRODUCT_PATH_RE = re.compile(r'/item/|/product/|/wholesale/')
+# Shortened affiliate link paths: /e/_opegQu9rmat, /deeplink, /s/..., /_mrgRqdB
+_SHORTENED_PATH_RE = re.compile(r'/e/_|/deeplink|/s/|/_[a-zA-Z0-9]+')
+
 def is_valid_aliexpress_url(url):
     """Validate AliExpress URLs more thoroughly"""
     try:
@@ -95,27 +101,12 @@ def is_valid_aliexpress_url(url):
         if not (parsed.netloc.endswith('.aliexpress.com') or parsed.netloc == 'aliexpress.com'):
             return False
             
-        # Check for product patterns
-        product_patterns = [
-            r'/item/',
-            r'/product/',
-            r'/wholesale/'
-        ]
-        
-        # Check for shortened affiliate links - expanded to include more formats
-        shortened_patterns = [
-            r'/e/_',  # Shortened affiliate links like /e/_opegQu9rmat
-            r'/deeplink',  # Deep link format
-            r'/s/',  # Another shortened format
-            r'/_[a-zA-Z0-9]+',  # New format like /_mrgRqdB
-        ]
-        
         # Check if it's a product URL
-        if any(re.search(pattern, parsed.path) for pattern in product_patterns):
+        if _PRODUCT_PATH_RE.search(parsed.path):
             return True
             
         # Check if it's a shortened affiliate link
-        if any(re.search(pattern, parsed.path) for pattern in shortened_patterns):
+        if _SHORTENED_PATH_RE.search(parsed.path):
             return True
             
         return False
@@ -123,28 +114,28 @@ def is_valid_aliexpress_url(url):
         logger.error(f"Error validating URL: {e}")
         return False
 
+# Characters stripped from pasted URLs before validation
+_INVISIBLE_CHARS_RE = re.compile(
+    r'[\u200B-\u200D\uFEFF'  # Zero-width spaces and other invisible characters
+    r'\u2028\u2029'  # Line/paragraph separators
+    r'\u2060-\u2064'  # Other invisible characters
+    r'\u00A0'  # Non-breaking space
+    r'\u1680\u180E'  # Other space characters
+    r'\u2000-\u200A'  # Various space characters
+    r'\u205F'  # Medium mathematical space
+    r'\x00-\x08\x0B\x0C\x0E-\x1F]'  # Control characters other than \t, \n and \r
+)
+# Essential product part of an over-long URL
+_PRODUCT_URL_RE = re.compile(r'(https?://[^/]+/item/\d+\.html)')
+
 def clean_url_for_validation(url):
     """Clean URL for validation by removing problematic characters and encoding"""
     try:
         # Remove common problematic characters that might be invisible
         cleaned = url.strip()
         
-        # Check for common problematic patterns
-        problematic_patterns = [
-            r'[\u200B-\u200D\uFEFF]',  # Zero-width spaces and other invisible characters
-            r'[\u2028\u2029]',  # Line/paragraph separators
-            r'[\u2060-\u2064]',  # Other invisible characters
-            r'[\u00A0]',  # Non-breaking space
-            r'[\u1680\u180E]',  # Other space characters
-            r'[\u2000-\u200A]',  # Various space characters
-            r'[\u205F]',  # Medium mathematical space
-        ]
-        
-        for pattern in problematic_patterns:
-            cleaned = re.sub(pattern, '', cleaned)
-        
-        # Remove any remaining control characters
-        cleaned = ''.join(char for char in cleaned if ord(char) >= 32 or char in '\n\r\t')
+        # Remove invisible/space characters and control characters in a single pass
+        cleaned = _INVISIBLE_CHARS_RE.sub('', cleaned)
         
         # Check if URL contains only printable ASCII characters (basic validation)
         try:
@@ -163,7 +154,7 @@ def clean_url_for_validation(url):
             # For very long URLs, try to extract just the essential product part
             if 'aliexpress.com/item/' in cleaned:
                 # Extract just the product ID and basic structure
-                product_match = re.search(r'(https?://[^/]+/item/\d+\.html)', cleaned)
+                product_match = _PRODUCT_URL_RE.search(cleaned)
                 if product_match:
                     cleaned = product_match.group(1)
                     logger.info(f"Extracted clean product URL from long URL: {cleaned}")
@@ -218,10 +209,7 @@ def extract_clean_product_url(url):
                 return clean_url
         
         # If it's a shortened link, return as-is (will be expanded later)
-        shortened_patterns = [
-            r'/e/_', r'/deeplink', r'/s/', r'/_[a-zA-Z0-9]+'
-        ]
-        if any(re.search(pattern, clean_path) for pattern in shortened_patterns):
+        if _SHORTENED_PATH_RE.search(clean_path):
             return cleaned_url
             
         return None
@@ -250,7 +238,7 @@ async def aliexpress_api_request(params):
     api_url = 'https://api-sg.aliexpress.com/sync'
     params['app_key'] = API_KEY
     params['sign_method'] = 'sha256'
-    params['timestamp'] = time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime())
+    params['timestamp'] = now_ts_str()
     params['v'] = '2.0'
     params['sign'] = generate_hmac_signature_upper(params, SECRET_KEY)
     
@@ -264,7 +252,7 @@ async def aliexpress_api_request(params):
                 if response.status == 200:
                     data = await response.json()
                     logger.info(f"🔍 API Response Status: {response.status}")
-                    logger.info(f"🔍 API Response Data: {data}")
+                    logger.debug("🔍 API Response Data: %s", data)
                     
                     # Check if response contains error information
                     if 'error_response' in data:
@@ -283,6 +271,29 @@ async def aliexpress_api_request(params):
         logger.error(f"Error making API request: {e}")
         return None
 
+# Clean product URL -> (expires_at, short affiliate link), least recently used first
+_AFFILIATE_LINK_CACHE = OrderedDict()
+_AFFILIATE_LINK_CACHE_SIZE = 1024
+_AFFILIATE_LINK_CACHE_TTL = 3600
+
+def _get_cached_affiliate_link(clean_url):
+    """Return a previously generated link for clean_url if it hasn't expired"""
+    cached = _AFFILIATE_LINK_CACHE.get(clean_url)
+    if cached is None:
+        return None
+    if cached[0] <= time.monotonic():
+        del _AFFILIATE_LINK_CACHE[clean_url]
+        return None
+    _AFFILIATE_LINK_CACHE.move_to_end(clean_url)
+    return cached[1]
+
+def _cache_affiliate_link(clean_url, short_link):
+    """Remember a generated link, evicting the least recently used one when full"""
+    _AFFILIATE_LINK_CACHE[clean_url] = (time.monotonic() + _AFFILIATE_LINK_CACHE_TTL, short_link)
+    _AFFILIATE_LINK_CACHE.move_to_end(clean_url)
+    if len(_AFFILIATE_LINK_CACHE) > _AFFILIATE_LINK_CACHE_SIZE:
+        _AFFILIATE_LINK_CACHE.popitem(last=False)
+
 async def generate_affiliate_link(product_url):
     """Generate affiliate link directly from product URL"""
     try:
@@ -298,14 +309,7 @@ async def generate_affiliate_link(product_url):
             return None
             
         # Check if it's a shortened link and expand it
-        parsed_url = urlparse(clean_url)
-        shortened_patterns = [
-            r'/e/_', r'/deeplink', r'/s/', r'/e/[a-zA-Z0-9]+',
-            r'/_[a-zA-Z0-9]+',  # New format like /_mrgRqdB
-        ]
-        is_shortened_link = any(re.search(pattern, parsed_url.path) for pattern in shortened_patterns)
-
-        if is_shortened_link:
+        if _SHORTENED_PATH_RE.search(urlparse(clean_url).path):
             logger.info("Detected shortened affiliate link, expanding to get actual product URL")
             expanded_url = await expand_shortened_link(clean_url)
             if expanded_url:
@@ -315,6 +319,12 @@ async def generate_affiliate_link(product_url):
                 logger.error("Failed to expand shortened link")
                 return None
 
+        # The same product is often shared many times; skip the API call for repeats
+        cached_link = _get_cached_affiliate_link(clean_url)
+        if cached_link:
+            logger.info(f"Using cached affiliate link for: {clean_url}")
+            return cached_link
+
         # Use the correct human-readable tracking ID
         tracking_id = 'bargainbliss_ai_bot'
         
@@ -323,6 +333,7 @@ async def generate_affiliate_link(product_url):
         short_link = await generate_short_affiliate_link(clean_url, tracking_id)
         if short_link:
             logger.info(f"✅ SUCCESS! Generated short affiliate link: {short_link}")
+            _cache_affiliate_link(clean_url, short_link)
             return short_link
         else:
             logger.error("❌ Failed to generate short affiliate link")
@@ -527,6 +538,10 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
         logger.error(f"Error processing message: {e}")
         await processing_msg.edit_text(message_manager.get_message("processing_error"), parse_mode='HTML')
 
+# Invisible characters commonly added by browser share sheets
+_INVISIBLE_CHARS = '\u200B\u200C\u200D\uFEFF\u2028\u2029'
+_INVISIBLE_CHARS_TABLE = dict.fromkeys(map(ord, _INVISIBLE_CHARS), None)
+
 def try_salvage_url(url):
     """Try to salvage a problematic URL by cleaning it"""
     try:
@@ -536,13 +551,12 @@ def try_salvage_url(url):
         cleaned = url.strip()
         logger.info(f"🔧 After strip: '{cleaned}'")
         
-        # Remove invisible characters
-        problematic_chars = ['\u200B', '\u200C', '\u200D', '\uFEFF', '\u2028', '\u2029']
-        for char in problematic_chars:
-            if char in cleaned:
-                logger.info(f"🔧 Found problematic character: {repr(char)}")
-                cleaned = cleaned.replace(char, '')
-                logger.info(f"🔧 After removing {repr(char)}: '{cleaned}'")
+        # Remove invisible characters in a single pass
+        found_chars = [char for char in _INVISIBLE_CHARS if char in cleaned]
+        if found_chars:
+            logger.info(f"🔧 Found problematic characters: {[repr(char) for char in found_chars]}")
+            cleaned = cleaned.translate(_INVISIBLE_CHARS_TABLE)
+            logger.info(f"🔧 After removing invisible characters: '{cleaned}'")
         
         # Try to extract product ID from messy URLs
         product_id_match = re.search(r'/item/(\d+)', cleaned)
@@ -609,24 +623,9 @@ def validate_aliexpress_url_detailed(url):
         if not (parsed.netloc.endswith('.aliexpress.com') or parsed.netloc == 'aliexpress.com'):
             return False
             
-        # Check for product patterns
-        product_patterns = [
-            r'/item/',
-            r'/product/',
-            r'/wholesale/'
-        ]
-        
-        # Check for shortened affiliate links - expanded to include more formats
-        shortened_patterns = [
-            r'/e/_',  # Shortened affiliate links like /e/_opegQu9rmat
-            r'/deeplink',  # Deep link format
-            r'/s/',  # Another shortened format
-            r'/_[a-zA-Z0-9]+',  # New format like /_mrgRqdB
-        ]
-        
         # Check if it's a product URL
-        has_product_pattern = any(re.search(pattern, parsed.path) for pattern in product_patterns)
-        has_shortened_pattern = any(re.search(pattern, parsed.path) for pattern in shortened_patterns)
+        has_product_pattern = _PRODUCT_PATH_RE.search(parsed.path) is not None
+        has_shortened_pattern = _SHORTENED_PATH_RE.search(parsed.path) is not None
         
         logger.info(f"🔍 Has product pattern: {has_product_pattern}")
         logger.info(f"🔍 Has shortened pattern: {has_shortened_pattern}")
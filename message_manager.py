@@ -1,5 +1,6 @@
 import json
 import os
+from _fastjson import loads as json_loads
 from typing import Dict, Any, Optional
 
 class MessageManager:
@@ -15,8 +16,8 @@ class MessageManager:
         """Load configuration from JSON file."""
         try:
             if os.path.exists(self.config_file):
-                with open(self.config_file, 'r', encoding='utf-8') as f:
-                    config = json.load(f)
+                with open(self.config_file, 'rb') as f:
+                    config = json_loads(f.read())
                     self.messages = config.get('messages', {})
                     self.settings = config.get('settings', {})
                 print(f"✅ Loaded {len(self.messages)} messages from {self.config_file}")
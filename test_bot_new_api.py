@@ -11,9 +11,9 @@ import hmac
 import hashlib
 import requests
 import re
-from urllib.parse import urlparse
 from collections import defaultdict
 from dotenv import load_dotenv
+from _aliexpress_sign import now_ts_str
 from telegram.ext import Application, CommandHandler, MessageHandler, filters, ContextTypes
 from telegram import Update
 
@@ -63,38 +63,21 @@ class RateLimiter:
 
 rate_limiter = RateLimiter()
 
+# AliExpress host (any subdomain) followed by a product or shortened-link path
+_ALIEXPRESS_URL_RE = re.compile(
+    r'^https?://(?:[A-Za-z0-9-]+\.)*aliexpress\.com(?::\d+)?'
+    r'(?:/[^?#]*?)?(?:/item/|/product/|/wholesale/|/e/_|/deeplink|/s/)'
+)
+
+# Shortened affiliate link paths: /e/_xxx, /e/xxx, /deeplink, /s/
+_SHORTENED_URL_RE = re.compile(
+    r'^[A-Za-z][A-Za-z0-9+.-]*://[^/?#]*(?:/[^?#]*?)?(?:/e/[_a-zA-Z0-9]|/deeplink|/s/)'
+)
+
 def is_valid_aliexpress_url(url):
     """Validate AliExpress URLs more thoroughly"""
     try:
-        parsed = urlparse(url)
-        
-        # Check for AliExpress domains (including country-specific subdomains)
-        if not (parsed.netloc.endswith('.aliexpress.com') or parsed.netloc == 'aliexpress.com'):
-            return False
-            
-        # Check for product patterns
-        product_patterns = [
-            r'/item/',
-            r'/product/',
-            r'/wholesale/'
-        ]
-        
-        # Check for shortened affiliate links
-        shortened_patterns = [
-            r'/e/_',  # Shortened affiliate links like /e/_opegQu9rmat
-            r'/deeplink',  # Deep link format
-            r'/s/',  # Another shortened format
-        ]
-        
-        # Check if it's a product URL
-        if any(re.search(pattern, parsed.path) for pattern in product_patterns):
-            return True
-            
-        # Check if it's a shortened affiliate link
-        if any(re.search(pattern, parsed.path) for pattern in shortened_patterns):
-            return True
-            
-        return False
+        return _ALIEXPRESS_URL_RE.match(url) is not None
     except:
         return False
 
@@ -146,21 +129,16 @@ def generate_affiliate_link_new_api(product_url):
     """Generate affiliate link using the working API method"""
     try:
         # Check if it's a shortened link and expand it
-        parsed_url = urlparse(product_url)
-        shortened_patterns = [
-            r'/e/_', r'/deeplink', r'/s/', r'/e/[a-zA-Z0-9]+',
-        ]
-        is_shortened_link = any(re.search(pattern, parsed_url.path) for pattern in shortened_patterns)
+        is_shortened_link = _SHORTENED_URL_RE.match(product_url) is not None
 
         if is_shortened_link:
             logger.info("Detected shortened affiliate link, expanding to get actual product URL")
-            expanded_url = expand_shortened_link(product_url)
-            if expanded_url:
-                logger.info(f"Successfully expanded shortened link to: {expanded_url}")
-                return generate_affiliate_link_new_api(expanded_url)  # Recursive call
-            else:
+            product_url = expand_shortened_link(product_url)
+            if not product_url:
                 logger.error("Failed to expand shortened link")
                 return None
+            # Continue with the expanded URL in the same call
+            logger.info(f"Successfully expanded shortened link to: {product_url}")
 
         # Extract product ID
         product_id = extract_product_id_from_url(product_url)
@@ -179,7 +157,7 @@ def generate_affiliate_link_new_api(product_url):
             'format': 'json',
             'v': '2.0',
             'sign_method': 'sha256',
-            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime()),
+            'timestamp': now_ts_str(),
             'fields': 'product_id,product_title,target_sale_price,product_main_image_url,promotion_link,product_detail_url,product_origin,product_shipping,product_weight,product_dimensions,original_price,discount,product_rating,product_review_count,product_sales,product_shop_name,evaluate_rate,lastest_volume',
             'product_ids': product_id,
             'currency': 'ILS',
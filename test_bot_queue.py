@@ -3,16 +3,19 @@
 Test script using bot_queue.py's implementation
 """
 
-import os
-import json
 import logging
 import time
 import hmac
 import hashlib
 import asyncio
-from dotenv import load_dotenv
+from _creds import get_creds
+from _aliexpress_sign import now_ts_str, sign
+from _aliexpress_links import is_search_link
+from _fastjson import loads as json_loads
 import aiohttp
 import re
+from collections import OrderedDict
+from typing import List, Optional
 
 # Configure logging
 logging.basicConfig(
@@ -21,13 +24,22 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Load environment variables
-load_dotenv()
+API_KEY, SECRET_KEY, TRACKING_ID = get_creds()
 
-# Load credentials
-API_KEY = os.getenv('AFFILIATE_API_KEY') or os.getenv('ALIBABA_API_KEY') or os.getenv('ALIEXPRESS_API_KEY')
-SECRET_KEY = os.getenv('AFFILIATE_SECRET_KEY') or os.getenv('ALIBABA_SECRET_KEY') or os.getenv('ALIEXPRESS_SECRET_KEY')
-TRACKING_ID = os.getenv('TRACKING_ID', 'bargainbliss_ai_bot')  # Use human-readable tracking ID
+# Product ID in item URLs like /item/1005009533140539.html
+_PRODUCT_ID_RE = re.compile(r'/item/(\d+)')
+
+def _extract_detail_url(data):
+    """Return product_detail_url from a product.query response, or None"""
+    if not data:
+        return None
+    resp_result = data.get("aliexpress_affiliate_product_query_response", {}).get("resp_result", {})
+    if resp_result.get('resp_code') not in (0, 200):  # Success
+        return None
+    products = ((resp_result.get("result") or {}).get("products") or {}).get("product") or []
+    if isinstance(products, dict):
+        products = [products]
+    return products[0].get('product_detail_url') if products else None
 
 class TestBot:
     def __init__(self):
@@ -45,13 +57,41 @@ class TestBot:
             'currency': 'ILS',
             'language': 'IL'
         }
+        self._session: Optional[aiohttp.ClientSession] = None
+        # (product_id, tracking_id) -> (expires_at, product_detail_url), least recently used first
+        self.detail_url_cache_ttl = 300
+        self.detail_url_cache_size = 1024
+        self._detail_url_cache = OrderedDict()
+        # Lookups in progress, so concurrent requests for the same product share one API call;
+        # each entry is removed as soon as its lookup finishes
+        self._detail_url_inflight = {}
+
+    def _get_session(self):
+        """Return the shared ClientSession, creating it on first use"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=100,
+                    limit_per_host=20,
+                    keepalive_timeout=60,
+                    ttl_dns_cache=300
+                ),
+                timeout=aiohttp.ClientTimeout(total=15)
+            )
+        return self._session
+
+    async def close(self):
+        """Close the shared ClientSession"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
 
     def generate_signature(self, params, secret, sign_method="sha256"):
-        """Generate API signature - exact copy from bot_queue.py"""
-        sorted_params = sorted(params.items())
-        sign_string = "".join(f"{k}{v}" for k, v in sorted_params)
-        hash_algorithm = hashlib.sha256 if sign_method.lower() == "sha256" else hashlib.md5
-        return hmac.new(secret.encode(), sign_string.encode(), hash_algorithm).hexdigest().upper()
+        """Generate API signature"""
+        if sign_method.lower() == "sha256":
+            return sign(params, secret)
+        sign_string = "".join(map("".join, sorted(params.items())))
+        return hmac.new(secret.encode(), sign_string.encode(), hashlib.md5).hexdigest().upper()
 
     async def aliexpress_api_request(self, params):
         """Make API request to AliExpress - exact copy from bot_queue.py"""
@@ -61,7 +101,7 @@ class TestBot:
         params.update({
             'app_key': self.api_key,
             'sign_method': 'sha256',
-            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime()),
+            'timestamp': now_ts_str(),
             'format': 'json',
             'v': '2.0'
         })
@@ -69,46 +109,65 @@ class TestBot:
         # Generate signature
         params['sign'] = self.generate_signature(params, self.secret_key)
         
-        logger.info(f"Making API request to: {api_url}")
-        logger.info(f"Parameters: {json.dumps(params, indent=2)}")
+        logger.info("Making API request to: %s", api_url)
+        logger.debug("Parameters: %s", params)
         
         try:
-            async with aiohttp.ClientSession() as session:
-                # Use POST instead of GET
-                async with session.post(api_url, data=params, timeout=15) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        logger.info(f"Response Data: {json.dumps(data, indent=2)}")
-                        return data
-                    else:
-                        logger.error(f"HTTP Error: {response.status}")
-                        logger.error(f"Response: {await response.text()}")
-                        return None
+            # Use POST instead of GET, reusing pooled connections
+            async with self._get_session().post(api_url, data=params) as response:
+                if response.status == 200:
+                    data = await response.json(loads=json_loads)
+                    logger.info("API %s ok", params.get('method'))
+                    logger.debug("Response Data: %s", data)
+                    return data
+                else:
+                    logger.error("HTTP Error: %s", response.status)
+                    logger.error("Response: %s", await response.text())
+                    return None
         except Exception as e:
-            logger.error(f"Error making API request: {e}")
+            logger.error("Error making API request: %s", e)
             return None
 
-    async def generate_affiliate_link(self, product_url):
-        """Generate affiliate link - two-step process like main program"""
-        # Extract product ID from URL
-        product_id = None
+    def extract_product_id(self, product_url):
+        """Extract the numeric product ID from an AliExpress item URL"""
         if '/item/' in product_url:
             # Extract product ID from URL like /item/1005009533140539.html
-            match = re.search(r'/item/(\d+)', product_url)
+            match = _PRODUCT_ID_RE.search(product_url)
             if match:
-                product_id = match.group(1)
-        
-        if not product_id:
-            logger.error("Could not extract product ID from URL")
-            return None
-        
-        # Use the correct human-readable tracking ID
-        tracking_id = 'bargainbliss_ai_bot'
-        logger.info(f"Using tracking ID: {tracking_id}")
-        logger.info(f"Using product ID: {product_id}")
+                return match.group(1)
+        return None
+
+    async def get_product_detail_url(self, product_id, tracking_id):
+        """Step 1: look up product_detail_url, served from cache for repeat products"""
+        key = (product_id, tracking_id)
+        cached = self._detail_url_cache.get(key)
+        if cached:
+            if cached[0] > time.monotonic():
+                self._detail_url_cache.move_to_end(key)
+                logger.info("Using cached product details for ID: %s", product_id)
+                return cached[1]
+            del self._detail_url_cache[key]
         
-        # STEP 1: Get product details using aliexpress.affiliate.product.query
-        logger.info(f"Step 1: Getting product details for ID: {product_id}")
+        task = self._detail_url_inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch_detail_url(key))
+            self._detail_url_inflight[key] = task
+            task.add_done_callback(lambda _: self._detail_url_inflight.pop(key, None))
+        # Shielded so one cancelled caller doesn't cancel the lookup for the others
+        return await asyncio.shield(task)
+
+    async def _fetch_detail_url(self, key):
+        """Query product_detail_url for key and cache it, evicting the least recently used entry when full"""
+        product_detail_url = await self.query_product_detail_url(*key)
+        if product_detail_url:
+            self._detail_url_cache[key] = (time.monotonic() + self.detail_url_cache_ttl, product_detail_url)
+            self._detail_url_cache.move_to_end(key)
+            if len(self._detail_url_cache) > self.detail_url_cache_size:
+                self._detail_url_cache.popitem(last=False)
+        return product_detail_url
+
+    async def query_product_detail_url(self, product_id, tracking_id):
+        """Look up product_detail_url using aliexpress.affiliate.product.query"""
         params = {
             "method": "aliexpress.affiliate.product.query",
             "format": "json",
@@ -119,31 +178,95 @@ class TestBot:
             "target_language": "IL"
         }
         
-        response = await self.aliexpress_api_request(params)
-        if response and "aliexpress_affiliate_product_query_response" in response:
-            resp = response["aliexpress_affiliate_product_query_response"]
-            if 'resp_result' in resp:
-                resp_result = resp['resp_result']
-                if resp_result.get('resp_code') in [0, 200]:  # Success
-                    if 'result' in resp_result and 'products' in resp_result['result']:
-                        products = resp_result['result']['products'].get('product', [])
-                        if products and len(products) > 0:
-                            product = products[0] if isinstance(products, list) else products
-                            product_detail_url = product.get('product_detail_url')
-                            
-                            if product_detail_url:
-                                # STEP 2: Generate short affiliate link using aliexpress.affiliate.link.generate
-                                logger.info(f"Step 2: Generating short affiliate link")
-                                short_link = await self.generate_short_affiliate_link(product_detail_url, tracking_id)
-                                if short_link:
-                                    logger.info(f"Generated short affiliate link: {short_link}")
-                                    return short_link
-        
-        logger.error(f"Failed to generate affiliate link for {product_url}")
+        # Keep only the field we need so the full response can be freed right away
+        return _extract_detail_url(await self.aliexpress_api_request(params))
+
+    async def generate_affiliate_link(self, product_url):
+        """Generate affiliate link - direct link.generate first, then the two-step process"""
+        # Use the correct human-readable tracking ID
+        tracking_id = 'bargainbliss_ai_bot'
+        logger.info("Using tracking ID: %s", tracking_id)
+        
+        product_id = self.extract_product_id(product_url)
+        
+        if not product_id:
+            logger.error("Could not extract product ID from URL")
+            return None
+        
+        logger.info("Using product ID: %s", product_id)
+        
+        # Fast path: link.generate often accepts the raw product URL as-is, but it may come
+        # back as a SearchText search-results link, which only the two-step process avoids
+        logger.info("Trying direct short affiliate link for: %s", product_url)
+        short_link = await self.generate_short_affiliate_link(product_url, tracking_id, quiet=True)
+        if short_link and not is_search_link(short_link):
+            logger.info("Generated short affiliate link: %s", short_link)
+            return short_link
+        logger.info("Direct link unusable, resolving the product URL first")
+        
+        # STEP 1: Get product details using aliexpress.affiliate.product.query
+        logger.info("Step 1: Getting product details for ID: %s", product_id)
+        product_detail_url = await self.get_product_detail_url(product_id, tracking_id)
+        
+        if product_detail_url:
+            # STEP 2: Generate short affiliate link using aliexpress.affiliate.link.generate
+            logger.info("Step 2: Generating short affiliate link")
+            short_link = await self.generate_short_affiliate_link(product_detail_url, tracking_id)
+            if short_link:
+                logger.info("Generated short affiliate link: %s", short_link)
+                return short_link
+        
+        logger.error("Failed to generate affiliate link for %s", product_url)
         return None
 
-    async def generate_short_affiliate_link(self, product_url, tracking_id):
-        """Generate short affiliate link using aliexpress.affiliate.link.generate"""
+    async def generate_affiliate_links_batch(self, urls: List[str]) -> List[Optional[str]]:
+        """Generate affiliate links for many product URLs concurrently.
+
+        All product.query calls are issued together, then all link.generate
+        calls; a semaphore caps in-flight requests to respect API quotas.
+        Unlike generate_affiliate_link, batches never try the direct fast path:
+        every URL goes through the two-step process.
+        """
+        tracking_id = 'bargainbliss_ai_bot'
+        semaphore = asyncio.Semaphore(20)
+
+        async def query_detail_url(product_id):
+            if not product_id:
+                return None
+            async with semaphore:
+                return await self.get_product_detail_url(product_id, tracking_id)
+
+        async def generate_short_link(detail_url):
+            if not detail_url or isinstance(detail_url, BaseException):
+                return None
+            async with semaphore:
+                return await self.generate_short_affiliate_link(detail_url, tracking_id)
+
+        product_ids = [self.extract_product_id(url) for url in urls]
+        detail_urls = await asyncio.gather(
+            *(query_detail_url(product_id) for product_id in product_ids),
+            return_exceptions=True
+        )
+        short_links = await asyncio.gather(
+            *(generate_short_link(detail_url) for detail_url in detail_urls),
+            return_exceptions=True
+        )
+        
+        results = []
+        for url, link in zip(urls, short_links):
+            if isinstance(link, BaseException):
+                logger.error("Error generating affiliate link for %s: %s", url, link)
+                link = None
+            elif not link:
+                logger.error("Failed to generate affiliate link for %s", url)
+            results.append(link)
+        return results
+
+    async def generate_short_affiliate_link(self, product_url, tracking_id, quiet=False):
+        """Generate short affiliate link using aliexpress.affiliate.link.generate
+        
+        quiet suppresses the output for attempts that are allowed to fail, like the fast path.
+        """
         
         # Use aliexpress.affiliate.link.generate to get short link
         params = {
@@ -168,10 +291,12 @@ class TestBot:
                         if promotion_links and len(promotion_links) > 0:
                             promotion_link = promotion_links[0].get("promotion_link")
                             if promotion_link:
-                                print(f"✅ Generated short affiliate link: {promotion_link}")
+                                if not quiet:
+                                    print(f"✅ Generated short affiliate link: {promotion_link}")
                                 return promotion_link
         
-        print("❌ Failed to generate short affiliate link")
+        if not quiet:
+            print("❌ Failed to generate short affiliate link")
         return None
 
 async def main():
@@ -180,12 +305,15 @@ async def main():
     test_url = "https://he.aliexpress.com/item/1005009533140539.html"
     
     logger.info("Starting test...")
-    logger.info(f"Testing with URL: {test_url}")
-    logger.info(f"Using API Key: {API_KEY[:8]}...")
-    logger.info(f"Using Tracking ID: {TRACKING_ID}")
+    logger.info("Testing with URL: %s", test_url)
+    logger.info("Using API Key: %s...", API_KEY[:8])
+    logger.info("Using Tracking ID: %s", TRACKING_ID)
     
     bot = TestBot()
-    result = await bot.generate_affiliate_link(test_url)
+    try:
+        result = await bot.generate_affiliate_link(test_url)
+    finally:
+        await bot.close()
     
     if result:
         logger.info("✅ Success! Generated affiliate link:")
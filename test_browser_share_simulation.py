@@ -5,10 +5,14 @@ Test script to simulate browser share scenarios and detect invisible characters
 
 import sys
 import os
+import re
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from bargainbliss_ai_bot import validate_aliexpress_url_detailed, try_salvage_url
 
+# Anything outside printable ASCII
+_NONPRINT_RE = re.compile(r'[^\x20-\x7e]')
+
 def test_browser_share_scenarios():
     """Test various browser share scenarios that might cause issues"""
     
@@ -47,10 +51,7 @@ def test_browser_share_scenarios():
         print(f"Starts with https://: {test_url.startswith('https://')}")
         
         # Show invisible characters
-        invisible_chars = []
-        for char in test_url:
-            if ord(char) < 32 or ord(char) > 126:
-                invisible_chars.append(f"\\u{ord(char):04x}")
+        invisible_chars = [f"\\u{ord(char):04x}" for char in _NONPRINT_RE.findall(test_url)]
         
         if invisible_chars:
             print(f"Invisible characters: {invisible_chars}")
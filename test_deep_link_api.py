@@ -3,28 +3,60 @@
 Test the new deep link API
 """
 
-import requests
+import asyncio
+import json
 import time
-import hashlib
-import os
-from dotenv import load_dotenv
+import aiohttp
+from _creds import get_creds
+from _aliexpress_sign import md5_sign
 
-# Load environment variables
-load_dotenv()
+API_KEY, SECRET_KEY, TRACKING_ID = get_creds()
 
-# Get credentials
-API_KEY = os.getenv('ALIEXPRESS_API_KEY') or os.getenv('AFFILIATE_API_KEY')
-SECRET_KEY = os.getenv('ALIEXPRESS_SECRET_KEY') or os.getenv('AFFILIATE_SECRET_KEY')
-TRACKING_ID = os.getenv('TRACKING_ID', 'bargainbliss_ai_bot')
-
-def generate_md5_signature(params, secret_key):
-    """Generate MD5 signature for deep link API"""
-    sorted_params = sorted(params.items())
-    param_string = ''.join([f"{k}{v}" for k, v in sorted_params])
-    param_string += secret_key
-    return hashlib.md5(param_string.encode('utf-8')).hexdigest()
+async def check_product(session, api_url, i, product_url):
+    """Request a deep link for one product URL and return the lines to print for it"""
+    lines = [f"\n{'='*20} Test {i} {'='*20}", f"Product URL: {product_url}"]
+    
+    # Deep link generation parameters
+    link_params = {
+        'app_key': API_KEY,
+        'method': 'api.link.generate',
+        'timestamp': time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime()),
+        'format': 'json',
+        'sign_method': 'md5',
+        'partner_id': TRACKING_ID,
+        'promotion_link_type': 'product',
+        'source_values': product_url
+    }
+    
+    # Generate MD5 signature
+    link_params['sign'] = md5_sign(link_params, SECRET_KEY)
+    
+    lines.append(f"API URL: {api_url}")
+    lines.append(f"Parameters: {link_params}")
+    
+    try:
+        async with session.get(api_url, params=link_params) as response:
+            text = await response.text()
+            lines.append(f"Status Code: {response.status}")
+            lines.append(f"Response: {text}")
+            
+            if response.status == 200:
+                data = json.loads(text)
+                if 'error_response' in data:
+                    lines.append(f"❌ API Error: {data['error_response']}")
+                elif 'result' in data:
+                    lines.append(f"✅ Success! Result: {data['result']}")
+                else:
+                    lines.append(f"⚠️ Unexpected response format: {data}")
+            else:
+                lines.append(f"❌ HTTP Error: {response.status}")
+                
+    except Exception as e:
+        lines.append(f"❌ Exception: {e}")
+    
+    return lines
 
-def test_deep_link_api():
+async def test_deep_link_api():
     print("🔍 Testing AliExpress Deep Link API")
     print("=" * 50)
     
@@ -37,46 +69,18 @@ def test_deep_link_api():
     
     api_url = 'https://api.aliexpress.com/open/api/deep_link'
     
-    for i, product_url in enumerate(test_urls, 1):
-        print(f"\n{'='*20} Test {i} {'='*20}")
-        print(f"Product URL: {product_url}")
-        
-        # Deep link generation parameters
-        link_params = {
-            'app_key': API_KEY,
-            'method': 'api.link.generate',
-            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime()),
-            'format': 'json',
-            'sign_method': 'md5',
-            'partner_id': TRACKING_ID,
-            'promotion_link_type': 'product',
-            'source_values': product_url
-        }
-        
-        # Generate MD5 signature
-        link_params['sign'] = generate_md5_signature(link_params, SECRET_KEY)
-        
-        print(f"API URL: {api_url}")
-        print(f"Parameters: {link_params}")
-        
-        try:
-            response = requests.get(api_url, params=link_params, timeout=10)
-            print(f"Status Code: {response.status_code}")
-            print(f"Response: {response.text}")
-            
-            if response.status_code == 200:
-                data = response.json()
-                if 'error_response' in data:
-                    print(f"❌ API Error: {data['error_response']}")
-                elif 'result' in data:
-                    print(f"✅ Success! Result: {data['result']}")
-                else:
-                    print(f"⚠️ Unexpected response format: {data}")
-            else:
-                print(f"❌ HTTP Error: {response.status_code}")
-                
-        except Exception as e:
-            print(f"❌ Exception: {e}")
+    # Run all URLs concurrently over one pooled session
+    async with aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=10),
+        timeout=aiohttp.ClientTimeout(total=10)
+    ) as session:
+        reports = await asyncio.gather(*[
+            check_product(session, api_url, i, product_url)
+            for i, product_url in enumerate(test_urls, 1)
+        ])
+    
+    for lines in reports:
+        print("\n".join(lines))
 
 if __name__ == "__main__":
-    test_deep_link_api() 
\ No newline at end of file
+    asyncio.run(test_deep_link_api())
@@ -3,113 +3,82 @@
 Detailed API test to see exact responses
 """
 
-import requests
+import asyncio
+import json
 import time
-import hashlib
-import hmac
-import os
 from urllib.parse import urlparse
 import re
-from dotenv import load_dotenv
+from _creds import get_creds
+from _aliexpress_sign import sign
+import aiohttp
 
-# Load environment variables
-load_dotenv()
+API_KEY, SECRET_KEY, TRACKING_ID = get_creds()
 
-# Get credentials
-API_KEY = os.getenv('ALIEXPRESS_API_KEY') or os.getenv('AFFILIATE_API_KEY')
-SECRET_KEY = os.getenv('ALIEXPRESS_SECRET_KEY') or os.getenv('AFFILIATE_SECRET_KEY')
-TRACKING_ID = os.getenv('TRACKING_ID', 'bargainbliss_ai_bot')
+# Product ID in item URLs like /item/1005009533140539.html
+_PRODUCT_ID_RE = re.compile(r'/item/(\d+)')
 
-def generate_hmac_signature_upper(params, secret_key):
-    """Generate HMAC-SHA256 signature in uppercase for AliExpress API"""
-    # Sort parameters by key and concatenate
-    sorted_params = sorted(params.items())
-    param_string = ''.join([f"{k}{v}" for k, v in sorted_params])
-    
-    # Generate HMAC-SHA256 signature
-    signature = hmac.new(
-        secret_key.encode('utf-8'),
-        param_string.encode('utf-8'),
-        hashlib.sha256
-    ).hexdigest().upper()
-    
-    return signature
-
-def main():
-    print("🔍 Detailed AliExpress API Test")
-    print("=" * 50)
+async def check_product(session, api_url, i, test_url):
+    """Request an affiliate link for one product URL and return the lines to print for it"""
+    lines = [f"\n{'='*20} Test {i} {'='*20}"]
     
-    # Test different product URLs
-    test_urls = [
-        "https://www.aliexpress.com/item/1005004842197456.html",
-        "https://www.aliexpress.com/item/1005001234567890.html",
-        "https://www.aliexpress.com/item/1005009876543210.html"
-    ]
+    # Extract product ID
+    parsed_url = urlparse(test_url)
+    product_id_match = _PRODUCT_ID_RE.search(parsed_url.path)
+    product_id = product_id_match.group(1) if product_id_match else "1005004842197456"
     
-    print(f"API Key: {API_KEY}")
-    print(f"Secret Key: {SECRET_KEY[:10]}...")
-    print(f"Tracking ID: {TRACKING_ID}")
+    lines.append(f"Testing with product ID: {product_id}")
     
-    # API endpoint
-    api_url = 'https://api-sg.aliexpress.com/sync'
+    # Request parameters
+    params = {
+        'app_key': API_KEY,
+        'method': 'aliexpress.affiliate.link.generate',
+        'format': 'json',
+        'v': '2.0',
+        'sign_method': 'sha256',
+        'timestamp': time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime()),
+        'product_id': product_id,
+        'tracking_id': TRACKING_ID,
+        'source_url': test_url,
+        'promotion_link_type': '0',
+        'source_values': 'telegram_bot'
+    }
     
-    for i, test_url in enumerate(test_urls, 1):
-        print(f"\n{'='*20} Test {i} {'='*20}")
-        
-        # Extract product ID
-        parsed_url = urlparse(test_url)
-        product_id_match = re.search(r'/item/(\d+)', parsed_url.path)
-        product_id = product_id_match.group(1) if product_id_match else "1005004842197456"
-        
-        print(f"Testing with product ID: {product_id}")
-        
-        # Request parameters
-        params = {
-            'app_key': API_KEY,
-            'method': 'aliexpress.affiliate.link.generate',
-            'format': 'json',
-            'v': '2.0',
-            'sign_method': 'sha256',
-            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime()),
-            'product_id': product_id,
-            'tracking_id': TRACKING_ID,
-            'source_url': test_url,
-            'promotion_link_type': '0',
-            'source_values': 'telegram_bot'
-        }
-        
-        # Generate signature
-        params['sign'] = generate_hmac_signature_upper(params, SECRET_KEY)
-        
-        print(f"Making API request...")
-        
-        try:
-            response = requests.get(api_url, params=params, timeout=10)
-            print(f"Status Code: {response.status_code}")
-            print(f"Response: {response.text}")
+    # Generate signature
+    params['sign'] = sign(params, SECRET_KEY)
+    
+    lines.append(f"Making API request...")
+    
+    try:
+        async with session.get(api_url, params=params) as response:
+            text = await response.text()
+            lines.append(f"Status Code: {response.status}")
+            lines.append(f"Response: {text}")
             
-            if response.status_code == 200:
-                data = response.json()
+            if response.status == 200:
+                data = json.loads(text)
                 if 'error_response' in data:
-                    print(f"❌ API Error: {data['error_response']}")
+                    lines.append(f"❌ API Error: {data['error_response']}")
                 elif 'aliexpress_affiliate_link_generate_response' in data:
                     resp = data['aliexpress_affiliate_link_generate_response']
                     if 'resp_result' in resp:
                         result = resp['resp_result']
                         if result.get('resp_code') == 405:
-                            print(f"⚠️ Product not available for affiliate links")
+                            lines.append(f"⚠️ Product not available for affiliate links")
                         else:
-                            print(f"✅ Success! Result: {result}")
+                            lines.append(f"✅ Success! Result: {result}")
                 else:
-                    print(f"⚠️ Unexpected response format: {data}")
+                    lines.append(f"⚠️ Unexpected response format: {data}")
             else:
-                print(f"❌ HTTP Error: {response.status_code}")
+                lines.append(f"❌ HTTP Error: {response.status}")
                 
-        except Exception as e:
-            print(f"❌ Exception: {e}")
+    except Exception as e:
+        lines.append(f"❌ Exception: {e}")
     
-    # Also test product query method
-    print(f"\n{'='*20} Testing Product Query {'='*20}")
+    return lines
+
+async def check_product_query(session, api_url):
+    """Run the keyword product query and return the lines to print for it"""
+    lines = [f"\n{'='*20} Testing Product Query {'='*20}"]
     
     params = {
         'app_key': API_KEY,
@@ -123,17 +92,51 @@ def main():
     }
     
     # Generate signature
-    params['sign'] = generate_hmac_signature_upper(params, SECRET_KEY)
+    params['sign'] = sign(params, SECRET_KEY)
     
-    print(f"Testing product query with keywords: 'phone'")
+    lines.append(f"Testing product query with keywords: 'phone'")
     
     try:
-        response = requests.get(api_url, params=params, timeout=10)
-        print(f"Status Code: {response.status_code}")
-        print(f"Response: {response.text}")
+        async with session.get(api_url, params=params) as response:
+            lines.append(f"Status Code: {response.status}")
+            lines.append(f"Response: {await response.text()}")
         
     except Exception as e:
-        print(f"❌ Exception: {e}")
+        lines.append(f"❌ Exception: {e}")
+    
+    return lines
+
+async def main():
+    print("🔍 Detailed AliExpress API Test")
+    print("=" * 50)
+    
+    # Test different product URLs
+    test_urls = [
+        "https://www.aliexpress.com/item/1005004842197456.html",
+        "https://www.aliexpress.com/item/1005001234567890.html",
+        "https://www.aliexpress.com/item/1005009876543210.html"
+    ]
+    
+    print(f"API Key: {API_KEY}")
+    print(f"Secret Key: {SECRET_KEY[:10]}...")
+    print(f"Tracking ID: {TRACKING_ID}")
+    
+    # API endpoint
+    api_url = 'https://api-sg.aliexpress.com/sync'
+    
+    # Run all requests concurrently over one pooled session
+    async with aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=10),
+        timeout=aiohttp.ClientTimeout(total=10)
+    ) as session:
+        reports = await asyncio.gather(
+            *[check_product(session, api_url, i, test_url) for i, test_url in enumerate(test_urls, 1)],
+            # Also test product query method
+            check_product_query(session, api_url)
+        )
+    
+    for lines in reports:
+        print("\n".join(lines))
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    asyncio.run(main())
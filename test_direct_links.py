@@ -3,16 +3,17 @@
 Test different parameter combinations for generating direct product links
 """
 
-import os
-import json
 import logging
-import time
 import hmac
 import hashlib
 import asyncio
 import re
-from dotenv import load_dotenv
+from _creds import get_creds
 import aiohttp
+from typing import Optional
+from _fastjson import dumps as json_dumps, loads as json_loads
+from _aliexpress_sign import now_ts_str, sign
+from _aliexpress_links import is_search_link
 
 # Configure logging
 logging.basicConfig(
@@ -21,26 +22,61 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Load environment variables
-load_dotenv()
-
-# Load credentials
-API_KEY = os.getenv('AFFILIATE_API_KEY') or os.getenv('ALIBABA_API_KEY') or os.getenv('ALIEXPRESS_API_KEY')
-SECRET_KEY = os.getenv('AFFILIATE_SECRET_KEY') or os.getenv('ALIBABA_SECRET_KEY') or os.getenv('ALIEXPRESS_SECRET_KEY')
+API_KEY, SECRET_KEY, _ = get_creds()
+# Always test with the human-readable tracking ID, whatever TRACKING_ID is set to
 TRACKING_ID = 'bargainbliss_ai_bot'
 
+# Product ID in item URLs like /item/1005004896181006.html
+_ITEM_ID_RE = re.compile(r'/item/(\d+)')
+
+class _LazyJson:
+    """Log argument that is only serialized to indented JSON if the record is emitted"""
+    __slots__ = ('obj',)
+
+    def __init__(self, obj):
+        self.obj = obj
+
+    def __str__(self):
+        return json_dumps(self.obj, indent=2)
+
 class DirectLinkTester:
     def __init__(self):
         self.api_key = API_KEY
         self.secret_key = SECRET_KEY
         self.tracking_id = TRACKING_ID
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    def _get_session(self):
+        """Return the shared ClientSession, creating it on first use"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=10,
+                    ttl_dns_cache=300,
+                    keepalive_timeout=60
+                ),
+                timeout=aiohttp.ClientTimeout(total=15)
+            )
+        return self._session
+
+    async def close(self):
+        """Close the shared ClientSession"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
 
     def generate_signature(self, params, secret, sign_method="sha256"):
         """Generate API signature"""
-        sorted_params = sorted(params.items())
-        sign_string = "".join(f"{k}{v}" for k, v in sorted_params)
-        hash_algorithm = hashlib.sha256 if sign_method.lower() == "sha256" else hashlib.md5
-        return hmac.new(secret.encode(), sign_string.encode(), hash_algorithm).hexdigest().upper()
+        if sign_method.lower() == "sha256":
+            return sign(params, secret)
+        sign_string = "".join(map("".join, sorted(params.items())))
+        return hmac.new(secret.encode(), sign_string.encode(), hashlib.md5).hexdigest().upper()
 
     async def aliexpress_api_request(self, params):
         """Make API request to AliExpress"""
@@ -50,7 +86,7 @@ class DirectLinkTester:
         params.update({
             'app_key': self.api_key,
             'sign_method': 'sha256',
-            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime()),
+            'timestamp': now_ts_str(),
             'format': 'json',
             'v': '2.0'
         })
@@ -59,30 +95,61 @@ class DirectLinkTester:
         params['sign'] = self.generate_signature(params, self.secret_key)
         
         logger.info(f"Making API request to: {api_url}")
-        logger.info(f"Parameters: {json.dumps(params, indent=2)}")
+        # Formatting is deferred, so nothing is serialized when INFO is filtered out
+        logger.info("Parameters: %s", _LazyJson(params))
         
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(api_url, data=params, timeout=15) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        logger.info(f"Response Data: {json.dumps(data, indent=2)}")
-                        return data
-                    else:
-                        logger.error(f"HTTP Error: {response.status}")
-                        logger.error(f"Response: {await response.text()}")
-                        return None
+            async with self._get_session().post(api_url, data=params) as response:
+                if response.status == 200:
+                    data = json_loads(await response.read())
+                    logger.info("Response Data: %s", _LazyJson(data))
+                    return data
+                else:
+                    logger.error(f"HTTP Error: {response.status}")
+                    logger.error(f"Response: {await response.text()}")
+                    return None
         except Exception as e:
             logger.error(f"Error making API request: {e}")
             return None
 
+    def _extract_promotion_link(self, response, resp_key, coll_key):
+        """Return the first promotion_link from a link.generate or product response, or None"""
+        try:
+            resp_result = response[resp_key]['resp_result']
+            if resp_result.get('resp_code') not in (0, 200):
+                return None
+            items = resp_result['result'][coll_key].get('product' if coll_key == 'products' else 'promotion_link', [])
+            if isinstance(items, dict):
+                items = [items]
+            if not items:
+                return None
+            return items[0].get('promotion_link')
+        except (KeyError, TypeError, AttributeError):
+            return None
+
+    async def _probe(self, product_url, link_type):
+        """Generate a link with one promotion_link_type; returns (link_type, promotion_link or None)"""
+        logger.info(f"\n=== Testing promotion_link_type: {link_type} ===")
+        
+        params = {
+            'method': 'aliexpress.affiliate.link.generate',
+            'format': 'json',
+            'source_values': product_url,
+            'tracking_id': self.tracking_id,
+            'promotion_link_type': link_type,
+            'target_currency': 'ILS',
+            'target_language': 'IL'
+        }
+        
+        response = await self.aliexpress_api_request(params)
+        return link_type, self._extract_promotion_link(
+            response, 'aliexpress_affiliate_link_generate_response', 'promotion_links'
+        )
+
     async def test_different_approaches(self, product_url):
         """Test different approaches to generate direct product links"""
-        product_id = None
-        if '/item/' in product_url:
-            match = re.search(r'/item/(\d+)', product_url)
-            if match:
-                product_id = match.group(1)
+        match = _ITEM_ID_RE.search(product_url)
+        product_id = match.group(1) if match else None
         
         if not product_id:
             logger.error("Could not extract product ID from URL")
@@ -90,40 +157,19 @@ class DirectLinkTester:
         
         logger.info(f"Testing different approaches for product ID: {product_id}")
         
-        # Approach 1: Try different promotion_link_type values
+        # Approach 1: Try different promotion_link_type values, all at once
         promotion_link_types = ['0', '1', '2', '3']
         
-        for link_type in promotion_link_types:
-            logger.info(f"\n=== Testing promotion_link_type: {link_type} ===")
-            
-            params = {
-                'method': 'aliexpress.affiliate.link.generate',
-                'format': 'json',
-                'source_values': product_url,
-                'tracking_id': self.tracking_id,
-                'promotion_link_type': link_type,
-                'target_currency': 'ILS',
-                'target_language': 'IL'
-            }
-            
-            response = await self.aliexpress_api_request(params)
-            if response and 'aliexpress_affiliate_link_generate_response' in response:
-                resp = response['aliexpress_affiliate_link_generate_response']
-                if 'resp_result' in resp:
-                    resp_result = resp['resp_result']
-                    if resp_result.get('resp_code') in [0, 200]:
-                        if 'result' in resp_result and 'promotion_links' in resp_result['result']:
-                            promotion_links = resp_result['result']['promotion_links'].get('promotion_link', [])
-                            if promotion_links and len(promotion_links) > 0:
-                                promotion_link = promotion_links[0].get('promotion_link')
-                                if promotion_link:
-                                    logger.info(f"✅ Generated link with type {link_type}: {promotion_link}")
-                                    # Check if it's a direct link (no SearchText)
-                                    if 'SearchText' not in promotion_link:
-                                        logger.info(f"🎉 FOUND DIRECT LINK! Type {link_type} works!")
-                                        return promotion_link
-                                    else:
-                                        logger.info(f"❌ Still search link with type {link_type}")
+        results = await asyncio.gather(*[self._probe(product_url, t) for t in promotion_link_types])
+        for link_type, promotion_link in results:
+            if promotion_link:
+                logger.info(f"✅ Generated link with type {link_type}: {promotion_link}")
+                # Check if it's a direct link (no SearchText)
+                if not is_search_link(promotion_link):
+                    logger.info(f"🎉 FOUND DIRECT LINK! Type {link_type} works!")
+                    return promotion_link
+                else:
+                    logger.info(f"❌ Still search link with type {link_type}")
         
         # Approach 2: Try using productdetail.get method
         logger.info(f"\n=== Testing aliexpress.affiliate.productdetail.get ===")
@@ -139,23 +185,14 @@ class DirectLinkTester:
         }
         
         response = await self.aliexpress_api_request(params)
-        if response and 'aliexpress_affiliate_productdetail_get_response' in response:
-            resp = response['aliexpress_affiliate_productdetail_get_response']
-            if 'resp_result' in resp:
-                resp_result = resp['resp_result']
-                if resp_result.get('resp_code') in [0, 200]:
-                    if 'result' in resp_result and 'products' in resp_result['result']:
-                        products = resp_result['result']['products'].get('product', [])
-                        if products and len(products) > 0:
-                            product = products[0] if isinstance(products, list) else products
-                            promotion_link = product.get('promotion_link')
-                            if promotion_link:
-                                logger.info(f"✅ Generated link with productdetail.get: {promotion_link}")
-                                if 'SearchText' not in promotion_link:
-                                    logger.info(f"🎉 FOUND DIRECT LINK! productdetail.get works!")
-                                    return promotion_link
-                                else:
-                                    logger.info(f"❌ Still search link with productdetail.get")
+        promotion_link = self._extract_promotion_link(response, 'aliexpress_affiliate_productdetail_get_response', 'products')
+        if promotion_link:
+            logger.info(f"✅ Generated link with productdetail.get: {promotion_link}")
+            if not is_search_link(promotion_link):
+                logger.info(f"🎉 FOUND DIRECT LINK! productdetail.get works!")
+                return promotion_link
+            else:
+                logger.info(f"❌ Still search link with productdetail.get")
         
         # Approach 3: Try using product.details.get method
         logger.info(f"\n=== Testing aliexpress.affiliate.product.details.get ===")
@@ -171,23 +208,14 @@ class DirectLinkTester:
         }
         
         response = await self.aliexpress_api_request(params)
-        if response and 'aliexpress_affiliate_product_details_get_response' in response:
-            resp = response['aliexpress_affiliate_product_details_get_response']
-            if 'resp_result' in resp:
-                resp_result = resp['resp_result']
-                if resp_result.get('resp_code') in [0, 200]:
-                    if 'result' in resp_result and 'products' in resp_result['result']:
-                        products = resp_result['result']['products'].get('product', [])
-                        if products and len(products) > 0:
-                            product = products[0] if isinstance(products, list) else products
-                            promotion_link = product.get('promotion_link')
-                            if promotion_link:
-                                logger.info(f"✅ Generated link with product.details.get: {promotion_link}")
-                                if 'SearchText' not in promotion_link:
-                                    logger.info(f"🎉 FOUND DIRECT LINK! product.details.get works!")
-                                    return promotion_link
-                                else:
-                                    logger.info(f"❌ Still search link with product.details.get")
+        promotion_link = self._extract_promotion_link(response, 'aliexpress_affiliate_product_details_get_response', 'products')
+        if promotion_link:
+            logger.info(f"✅ Generated link with product.details.get: {promotion_link}")
+            if not is_search_link(promotion_link):
+                logger.info(f"🎉 FOUND DIRECT LINK! product.details.get works!")
+                return promotion_link
+            else:
+                logger.info(f"❌ Still search link with product.details.get")
         
         logger.error("❌ No direct link generation method found")
         return None
@@ -202,8 +230,8 @@ async def main():
     logger.info(f"Using API Key: {API_KEY[:8]}...")
     logger.info(f"Using Tracking ID: {TRACKING_ID}")
     
-    tester = DirectLinkTester()
-    result = await tester.test_different_approaches(test_url)
+    async with DirectLinkTester() as tester:
+        result = await tester.test_different_approaches(test_url)
     
     if result:
         logger.info("✅ Success! Found direct product link:")
@@ -3,35 +3,18 @@
 Test script to find the correct API method for exact product queries
 """
 
-import requests
+import asyncio
 import time
-import hashlib
-import hmac
-import os
 from urllib.parse import urlparse
 import re
-from dotenv import load_dotenv
+from _creds import get_creds
+import aiohttp
+from _aliexpress_sign import sign
+from _fastjson import loads as json_loads
 
-# Load environment variables
-load_dotenv()
+API_KEY, SECRET_KEY, TRACKING_ID = get_creds()
 
-# Get credentials
-API_KEY = os.getenv('ALIEXPRESS_API_KEY') or os.getenv('AFFILIATE_API_KEY')
-SECRET_KEY = os.getenv('ALIEXPRESS_SECRET_KEY') or os.getenv('AFFILIATE_SECRET_KEY')
-TRACKING_ID = os.getenv('TRACKING_ID', 'bargainbliss_ai_bot')
-
-def generate_hmac_signature_upper(params, secret_key):
-    """Generate HMAC-SHA256 signature in uppercase for AliExpress API"""
-    sorted_params = sorted(params.items())
-    param_string = ''.join([f"{k}{v}" for k, v in sorted_params])
-    signature = hmac.new(
-        secret_key.encode('utf-8'),
-        param_string.encode('utf-8'),
-        hashlib.sha256
-    ).hexdigest().upper()
-    return signature
-
-def test_api_methods():
+async def test_api_methods():
     print("🔍 Testing AliExpress API Methods for Exact Product Queries")
     print("=" * 60)
     
@@ -45,71 +28,52 @@ def test_api_methods():
     
     api_url = 'https://api-sg.aliexpress.com/sync'
     
+    # One timestamp and one set of common parameters shared by every method
+    ts = time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime())
+    base = {
+        'app_key': API_KEY,
+        'format': 'json',
+        'v': '2.0',
+        'sign_method': 'sha256',
+        'timestamp': ts,
+        'tracking_id': TRACKING_ID
+    }
+    
     # Test different API methods
     methods_to_test = [
         {
             'name': 'aliexpress.affiliate.product.details.get',
-            'params': {
-                'app_key': API_KEY,
+            'overrides': {
                 'method': 'aliexpress.affiliate.product.details.get',
-                'format': 'json',
-                'v': '2.0',
-                'sign_method': 'sha256',
-                'timestamp': time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime()),
-                'product_id': product_id,
-                'tracking_id': TRACKING_ID
+                'product_id': product_id
             }
         },
         {
             'name': 'aliexpress.affiliate.product.info.get',
-            'params': {
-                'app_key': API_KEY,
+            'overrides': {
                 'method': 'aliexpress.affiliate.product.info.get',
-                'format': 'json',
-                'v': '2.0',
-                'sign_method': 'sha256',
-                'timestamp': time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime()),
-                'product_id': product_id,
-                'tracking_id': TRACKING_ID
+                'product_id': product_id
             }
         },
         {
             'name': 'aliexpress.affiliate.product.query (with exact ID)',
-            'params': {
-                'app_key': API_KEY,
+            'overrides': {
                 'method': 'aliexpress.affiliate.product.query',
-                'format': 'json',
-                'v': '2.0',
-                'sign_method': 'sha256',
-                'timestamp': time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime()),
-                'product_ids': product_id,  # Try product_ids instead of keywords
-                'tracking_id': TRACKING_ID
+                'product_ids': product_id  # Try product_ids instead of keywords
             }
         },
         {
             'name': 'aliexpress.affiliate.product.query (with product_id)',
-            'params': {
-                'app_key': API_KEY,
+            'overrides': {
                 'method': 'aliexpress.affiliate.product.query',
-                'format': 'json',
-                'v': '2.0',
-                'sign_method': 'sha256',
-                'timestamp': time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime()),
-                'product_id': product_id,  # Try product_id parameter
-                'tracking_id': TRACKING_ID
+                'product_id': product_id  # Try product_id parameter
             }
         },
         {
             'name': 'aliexpress.affiliate.link.generate (direct)',
-            'params': {
-                'app_key': API_KEY,
+            'overrides': {
                 'method': 'aliexpress.affiliate.link.generate',
-                'format': 'json',
-                'v': '2.0',
-                'sign_method': 'sha256',
-                'timestamp': time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime()),
                 'product_id': product_id,
-                'tracking_id': TRACKING_ID,
                 'source_url': f"https://www.aliexpress.com/item/{product_id}.html",
                 'promotion_link_type': '0',
                 'source_values': 'telegram_bot'
@@ -117,28 +81,48 @@ def test_api_methods():
         }
     ]
     
-    for i, method in enumerate(methods_to_test, 1):
-        print(f"\n{'='*20} Test {i}: {method['name']} {'='*20}")
-        
-        params = method['params'].copy()
-        params['sign'] = generate_hmac_signature_upper(params, SECRET_KEY)
+    # Every method has a fixed key set, so sort each one once up front
+    for method in methods_to_test:
+        method['sorted_keys'] = tuple(sorted(base.keys() | method['overrides'].keys()))
+    
+    async def _probe(session, i, method):
+        """Sign and send one method's request; returns the lines to print for it"""
+        lines = [f"\n{'='*20} Test {i}: {method['name']} {'='*20}"]
         
         try:
-            response = requests.get(api_url, params=params, timeout=10)
-            print(f"Status Code: {response.status_code}")
-            print(f"Response: {response.text[:500]}...")
+            # One dict merge per method; the shared base is never mutated.
+            # Signing sits inside the try so a missing credential fails only this probe
+            params = base | method['overrides']
+            params['sign'] = sign(params, SECRET_KEY, method['sorted_keys'])
             
-            if response.status_code == 200:
-                data = response.json()
-                if 'error_response' in data:
-                    print(f"❌ API Error: {data['error_response']}")
+            async with session.get(api_url, params=params) as response:
+                body = await response.read()
+                lines.append(f"Status Code: {response.status}")
+                # Decode only the bytes being printed; the parser takes the raw bytes
+                lines.append(f"Response: {body[:500].decode('utf-8', 'replace')}...")
+                
+                if response.status == 200:
+                    data = json_loads(body)
+                    if 'error_response' in data:
+                        lines.append(f"❌ API Error: {data['error_response']}")
+                    else:
+                        lines.append(f"✅ Success! Response structure: {list(data.keys())}")
                 else:
-                    print(f"✅ Success! Response structure: {list(data.keys())}")
-            else:
-                print(f"❌ HTTP Error: {response.status_code}")
+                    lines.append(f"❌ HTTP Error: {response.status}")
                 
         except Exception as e:
-            print(f"❌ Exception: {e}")
+            lines.append(f"❌ Exception: {e}")
+        
+        return lines
+    
+    # Independent probes, so send them all at once over one session
+    async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=10)) as session:
+        results = await asyncio.gather(*[
+            _probe(session, i, method) for i, method in enumerate(methods_to_test, 1)
+        ])
+    
+    for lines in results:
+        print("\n".join(lines))
 
 if __name__ == "__main__":
-    test_api_methods() 
\ No newline at end of file
+    asyncio.run(test_api_methods())
@@ -4,13 +4,14 @@ Test the new fallback method with correct tracking ID
 """
 
 import os
+import asyncio
 from dotenv import load_dotenv
 from bargainbliss_ai_bot import generate_affiliate_link_fallback, generate_affiliate_link
 
 # Load environment variables
 load_dotenv()
 
-def test_fallback_method():
+async def test_fallback_method():
     print("🔍 Testing New Fallback Method with Correct Tracking ID")
     print("=" * 60)
     
@@ -25,13 +26,16 @@ def test_fallback_method():
         "https://us.aliexpress.com/item/1005009876543210.html"
     ]
     
-    for i, test_url in enumerate(test_urls, 1):
+    # The fallback is built locally; the main method hits the API, so run those calls together
+    fallback_results = [generate_affiliate_link_fallback(test_url) for test_url in test_urls]
+    main_results = await asyncio.gather(*(generate_affiliate_link(test_url) for test_url in test_urls))
+    
+    for i, (test_url, fallback_result, main_result) in enumerate(zip(test_urls, fallback_results, main_results), 1):
         print(f"\n{'='*20} Test {i} {'='*20}")
         print(f"Input URL: {test_url}")
         
         # Test fallback method directly
         print("\n🔄 Testing Fallback Method...")
-        fallback_result = generate_affiliate_link_fallback(test_url)
         
         if fallback_result:
             print(f"✅ Fallback Result: {fallback_result}")
@@ -55,7 +59,6 @@ def test_fallback_method():
         
         # Test the main method (which will use fallback if API fails)
         print("\n🔄 Testing Main Method...")
-        main_result = generate_affiliate_link(test_url)
         
         if main_result:
             print(f"✅ Main Result: {main_result}")
@@ -69,4 +72,4 @@ def test_fallback_method():
             print("❌ Main method failed")
 
 if __name__ == "__main__":
-    test_fallback_method() 
\ No newline at end of file
+    asyncio.run(test_fallback_method()) 
\ No newline at end of file
@@ -3,31 +3,17 @@
 Test script to check IP whitelist issues
 """
 
-import requests
+from urllib3.util.retry import Retry
 import time
-import hashlib
-import hmac
-import os
-from dotenv import load_dotenv
+from _creds import get_creds
+from _http import make_session
+from _aliexpress_sign import sign
 
-# Load environment variables
-load_dotenv()
+API_KEY, SECRET_KEY, TRACKING_ID = get_creds()
 
-# Get credentials
-API_KEY = os.getenv('ALIEXPRESS_API_KEY') or os.getenv('AFFILIATE_API_KEY')
-SECRET_KEY = os.getenv('ALIEXPRESS_SECRET_KEY') or os.getenv('AFFILIATE_SECRET_KEY')
-TRACKING_ID = os.getenv('TRACKING_ID', 'bargainbliss_ai_bot')
-
-def generate_hmac_signature_upper(params, secret_key):
-    """Generate HMAC-SHA256 signature in uppercase for AliExpress API"""
-    sorted_params = sorted(params.items())
-    param_string = ''.join([f"{k}{v}" for k, v in sorted_params])
-    signature = hmac.new(
-        secret_key.encode('utf-8'),
-        param_string.encode('utf-8'),
-        hashlib.sha256
-    ).hexdigest().upper()
-    return signature
+_SESSION = make_session(
+    max_retries=Retry(total=2, backoff_factor=0.3, status_forcelist=[500, 502, 503, 504])
+)
 
 def test_ip_whitelist():
     print("🔍 Testing IP Whitelist Issues")
@@ -48,16 +34,17 @@ def test_ip_whitelist():
         'tracking_id': TRACKING_ID
     }
     
-    params['sign'] = generate_hmac_signature_upper(params, SECRET_KEY)
+    params['sign'] = sign(params, SECRET_KEY)
     
     print(f"Testing API connectivity...")
     print(f"API Key: {API_KEY}")
     print(f"Secret Key: {SECRET_KEY[:10]}...")
     
     try:
-        response = requests.get(api_url, params=params, timeout=10)
+        response = _SESSION.get(api_url, params=params, timeout=10)
         print(f"Status Code: {response.status_code}")
-        print(f"Response: {response.text[:500]}...")
+        # Decode only the bytes being printed rather than the whole body
+        print(f"Response: {response.content[:500].decode('utf-8', 'replace')}...")
         
         if response.status_code == 200:
             data = response.json()
@@ -3,48 +3,98 @@
 Test new API approach based on the provided scripts
 """
 
-import requests
+import asyncio
 import time
-import hmac
-import hashlib
 import os
 import re
-from dotenv import load_dotenv
+from _creds import get_creds
+from _aliexpress_sign import sign, sign_variants
+from _fastjson import loads as json_loads
+import aiohttp
+from typing import Optional
 
-# Load environment variables
-load_dotenv()
-
-# Get credentials
-API_KEY = os.getenv('ALIEXPRESS_API_KEY') or os.getenv('AFFILIATE_API_KEY')
-SECRET_KEY = os.getenv('ALIEXPRESS_SECRET_KEY') or os.getenv('AFFILIATE_SECRET_KEY')
+API_KEY, SECRET_KEY, _ = get_creds()
 TRACKING_ID = os.getenv('TRACKING_ID', 'c01b8d720c9941f5bfbef6686e96e90a')
 
-def generate_hmac_signature_upper(params, secret_key):
-    """Generate HMAC-SHA256 signature in uppercase"""
-    sorted_params = sorted(params.items())
-    param_string = ''.join([f'{k}{v}' for k, v in sorted_params])
-    signature = hmac.new(
-        secret_key.encode('utf-8'),
-        param_string.encode('utf-8'),
-        hashlib.sha256
-    ).hexdigest().upper()
-    return signature
+# Product ID patterns, precompiled and tried in priority order: the first pattern that
+# matches anywhere in the URL wins, whatever its position
+_PID_PATTERNS = tuple(re.compile(p) for p in (
+    r'/item/(\d+)\.html',
+    r'product_id=(\d+)',
+    r'item/(\d+)',
+))
 
 def extract_product_id_from_url(url):
     """Extract product ID from AliExpress URL"""
-    patterns = [
-        r'/item/(\d+)\.html',
-        r'product_id=(\d+)',
-        r'item/(\d+)',
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, url)
+    for pattern in _PID_PATTERNS:
+        match = pattern.search(url)
         if match:
             return match.group(1)
     return None
 
-def test_new_api_approach(product_url, use_tracking_id=True):
+def _parse_product_response(data) -> Optional[str]:
+    """Print the first product from a product.query response and return its promotion link, or None"""
+    resp = data.get('aliexpress_affiliate_product_query_response')
+    if resp is None:
+        print("❌ No aliexpress_affiliate_product_query_response in data")
+        return None
+    
+    resp_result = resp.get('resp_result')
+    if resp_result is None:
+        print("❌ Invalid API response structure")
+        return None
+    
+    # Check if resp_code is 0 (success) or 200 (success)
+    if resp_result.get('resp_code') not in (0, 200):
+        print(f"❌ API Error: {resp_result.get('resp_msg', 'Unknown error')}")
+        return None
+    
+    if 'result' not in resp_result:
+        print("❌ No result in API response")
+        return None
+    
+    products = (resp_result['result'] or {}).get('products', {}).get('product')
+    if isinstance(products, dict):
+        products = [products]
+    if not products:
+        print("❌ No products found in API response")
+        return None
+    
+    product = products[0]
+    # One write for the whole block so it can't interleave with other output
+    print("\n".join([
+        "\n" + "="*60,
+        "📦 PRODUCT DETAILS",
+        "="*60,
+        f"Product ID: {product.get('product_id', 'N/A')}",
+        f"Title: {product.get('product_title', 'N/A')}",
+        f"Shop: {product.get('shop_name', 'N/A')}",
+        f"\n💰 PRICING",
+        f"Sale Price: {product.get('target_sale_price', 'N/A')} {product.get('target_sale_price_currency', 'N/A')}",
+        f"Original Price: {product.get('original_price', 'N/A')} {product.get('original_price_currency', 'N/A')}",
+        f"Discount: {product.get('discount', 'N/A')}",
+        f"\n🔗 LINKS",
+        f"Product URL: {product.get('product_detail_url', 'N/A')}",
+        f"Image URL: {product.get('product_main_image_url', 'N/A')}",
+        f"Promotion Link: {product.get('promotion_link', 'N/A')}"
+    ]))
+    
+    promotion_link = product.get('promotion_link')
+    if promotion_link:
+        print(f"\n✅ SUCCESS! Got real promotion link from API: {promotion_link}")
+        return promotion_link
+    print(f"\n❌ No promotion link in API response")
+    return None
+
+async def _fetch(session, api_url, params):
+    """Send one signed request; returns (status, parsed JSON on 200 else the start of the body)"""
+    async with session.get(api_url, params=params) as response:
+        if response.status == 200:
+            return response.status, await response.json(content_type=None, loads=json_loads)
+        # An error page only needs its opening bytes for diagnosis
+        return response.status, (await response.read())[:512].decode('utf-8', 'replace')
+
+async def test_new_api_approach(product_url, use_tracking_id=True):
     """Test the new API approach based on the provided scripts"""
     print("🔍 Testing New API Approach")
     print("=" * 50)
@@ -78,166 +128,82 @@ def test_new_api_approach(product_url, use_tracking_id=True):
         'page_size': '1'
     }
     
-    # Try different tracking_id parameter names
-    if use_tracking_id:
-        # Try different parameter names for tracking_id
-        tracking_params = [
-            ('tracking_id', TRACKING_ID),
-            ('trackingId', TRACKING_ID),
-            ('tracking-id', TRACKING_ID),
-            ('trackingid', TRACKING_ID),
-        ]
-        
-        for param_name, param_value in tracking_params:
-            print(f"\n🔄 Trying with {param_name}: {param_value}")
-            test_params = params.copy()
-            test_params[param_name] = param_value
-            test_params['sign'] = generate_hmac_signature_upper(test_params, SECRET_KEY)
+    async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=15)) as session:
+        # Try different tracking_id parameter names
+        if use_tracking_id:
+            # Try different parameter names for tracking_id
+            tracking_params = [
+                ('tracking_id', TRACKING_ID),
+                ('trackingId', TRACKING_ID),
+                ('tracking-id', TRACKING_ID),
+                ('trackingid', TRACKING_ID),
+            ]
+            
+            # The variants differ in one pair only, so the shared sorted prefix is hashed once
+            signatures = sign_variants(params, SECRET_KEY, tracking_params)
+            variants = [
+                {**params, param_name: param_value, 'sign': signature}
+                for (param_name, param_value), signature in zip(tracking_params, signatures)
+            ]
             
-            try:
-                response = requests.get(api_url, params=test_params, timeout=15)
-                print(f"📊 Response Status: {response.status_code}")
+            # The variants are independent, so send them together and check them in priority order
+            results = await asyncio.gather(
+                *(_fetch(session, api_url, test_params) for test_params in variants),
+                return_exceptions=True
+            )
+            
+            for (param_name, param_value), result in zip(tracking_params, results):
+                print(f"\n🔄 Trying with {param_name}: {param_value}")
+                
+                if isinstance(result, Exception):
+                    print(f"❌ Error making API request: {result}")
+                    continue
+                
+                status, body = result
+                print(f"📊 Response Status: {status}")
                 
-                if response.status_code == 200:
-                    data = response.json()
-                    print(f"📄 Response Data: {data}")
+                if status == 200:
+                    print(f"📄 Response Data: {body}")
                     
-                    if 'aliexpress_affiliate_product_query_response' in data:
-                        resp = data['aliexpress_affiliate_product_query_response']
-                        
-                        if 'resp_result' in resp:
-                            resp_result = resp['resp_result']
-                            # Check if resp_code is 0 (success) or 200 (success)
-                            if resp_result.get('resp_code') in [0, 200]:  # Success
-                                if 'result' in resp_result:
-                                    products_data = resp_result['result']['products']
-                                    products = products_data['product'] if isinstance(products_data['product'], list) else [products_data['product']]
-                                    
-                                    if products:
-                                        product = products[0]
-                                        print("\n" + "="*60)
-                                        print("📦 PRODUCT DETAILS")
-                                        print("="*60)
-                                        print(f"Product ID: {product.get('product_id', 'N/A')}")
-                                        print(f"Title: {product.get('product_title', 'N/A')}")
-                                        print(f"Shop: {product.get('shop_name', 'N/A')}")
-                                        print(f"\n💰 PRICING")
-                                        print(f"Sale Price: {product.get('target_sale_price', 'N/A')} {product.get('target_sale_price_currency', 'N/A')}")
-                                        print(f"Original Price: {product.get('original_price', 'N/A')} {product.get('original_price_currency', 'N/A')}")
-                                        print(f"Discount: {product.get('discount', 'N/A')}")
-                                        print(f"\n🔗 LINKS")
-                                        print(f"Product URL: {product.get('product_detail_url', 'N/A')}")
-                                        print(f"Image URL: {product.get('product_main_image_url', 'N/A')}")
-                                        print(f"Promotion Link: {product.get('promotion_link', 'N/A')}")
-                                        
-                                        promotion_link = product.get('promotion_link')
-                                        if promotion_link:
-                                            print(f"\n✅ SUCCESS! Got real promotion link from API: {promotion_link}")
-                                            return promotion_link
-                                        else:
-                                            print(f"\n❌ No promotion link in API response")
-                                            continue
-                                    else:
-                                        print("❌ No products found in API response")
-                                        continue
-                                else:
-                                    print("❌ No result in API response")
-                                    continue
-                            else:
-                                print(f"❌ API Error: {resp_result.get('resp_msg', 'Unknown error')}")
-                                continue
-                        else:
-                            print("❌ Invalid API response structure")
-                            continue
-                    else:
-                        print("❌ No aliexpress_affiliate_product_query_response in data")
+                    # A malformed body only rules out this variant, as before
+                    try:
+                        promotion_link = _parse_product_response(body)
+                    except Exception as e:
+                        print(f"❌ Error parsing API response: {e}")
                         continue
+                    if promotion_link:
+                        return promotion_link
                 else:
-                    print(f"❌ HTTP Error: {response.status_code}")
-                    print(f"Response: {response.text}")
-                    continue
-                    
-            except Exception as e:
-                print(f"❌ Error making API request: {e}")
-                continue
-    
-    # If all tracking_id attempts failed, try without tracking_id
-    print(f"\n🔄 Trying without tracking_id parameter...")
-    params['sign'] = generate_hmac_signature_upper(params, SECRET_KEY)
-    
-    try:
-        response = requests.get(api_url, params=params, timeout=15)
-        print(f"📊 Response Status: {response.status_code}")
+                    print(f"❌ HTTP Error: {status}")
+                    print(f"Response: {body}")
         
-        if response.status_code == 200:
-            data = response.json()
-            print(f"📄 Response Data: {data}")
+        # If all tracking_id attempts failed, try without tracking_id
+        print(f"\n🔄 Trying without tracking_id parameter...")
+        params['sign'] = sign(params, SECRET_KEY)
+        
+        try:
+            status, body = await _fetch(session, api_url, params)
+            print(f"📊 Response Status: {status}")
             
-            if 'aliexpress_affiliate_product_query_response' in data:
-                resp = data['aliexpress_affiliate_product_query_response']
+            if status == 200:
+                print(f"📄 Response Data: {body}")
                 
-                if 'resp_result' in resp:
-                    resp_result = resp['resp_result']
-                    # Check if resp_code is 0 (success) or 200 (success)
-                    if resp_result.get('resp_code') in [0, 200]:  # Success
-                        if 'result' in resp_result:
-                            products_data = resp_result['result']['products']
-                            products = products_data['product'] if isinstance(products_data['product'], list) else [products_data['product']]
-                            
-                            if products:
-                                product = products[0]
-                                print("\n" + "="*60)
-                                print("📦 PRODUCT DETAILS")
-                                print("="*60)
-                                print(f"Product ID: {product.get('product_id', 'N/A')}")
-                                print(f"Title: {product.get('product_title', 'N/A')}")
-                                print(f"Shop: {product.get('shop_name', 'N/A')}")
-                                print(f"\n💰 PRICING")
-                                print(f"Sale Price: {product.get('target_sale_price', 'N/A')} {product.get('target_sale_price_currency', 'N/A')}")
-                                print(f"Original Price: {product.get('original_price', 'N/A')} {product.get('original_price_currency', 'N/A')}")
-                                print(f"Discount: {product.get('discount', 'N/A')}")
-                                print(f"\n🔗 LINKS")
-                                print(f"Product URL: {product.get('product_detail_url', 'N/A')}")
-                                print(f"Image URL: {product.get('product_main_image_url', 'N/A')}")
-                                print(f"Promotion Link: {product.get('promotion_link', 'N/A')}")
-                                
-                                promotion_link = product.get('promotion_link')
-                                if promotion_link:
-                                    print(f"\n✅ SUCCESS! Got real promotion link from API: {promotion_link}")
-                                    return promotion_link
-                                else:
-                                    print(f"\n❌ No promotion link in API response")
-                                    return None
-                            else:
-                                print("❌ No products found in API response")
-                                return None
-                        else:
-                            print("❌ No result in API response")
-                            return None
-                    else:
-                        print(f"❌ API Error: {resp_result.get('resp_msg', 'Unknown error')}")
-                        return None
-                else:
-                    print("❌ Invalid API response structure")
-                    return None
+                return _parse_product_response(body)
             else:
-                print("❌ No aliexpress_affiliate_product_query_response in data")
+                print(f"❌ HTTP Error: {status}")
+                print(f"Response: {body}")
                 return None
-        else:
-            print(f"❌ HTTP Error: {response.status_code}")
-            print(f"Response: {response.text}")
+                
+        except Exception as e:
+            print(f"❌ Error making API request: {e}")
             return None
-            
-    except Exception as e:
-        print(f"❌ Error making API request: {e}")
-        return None
 
-def main():
+async def main():
     """Main function"""
     test_url = "https://he.aliexpress.com/item/1005004896181006.html"
     print(f"🧪 Testing with URL: {test_url}")
     
-    result = test_new_api_approach(test_url)
+    result = await test_new_api_approach(test_url)
     
     if result:
         print(f"\n🎉 SUCCESS! Real affiliate link from API: {result}")
@@ -245,4 +211,4 @@ def main():
         print(f"\n❌ Failed to get real affiliate link from API")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    asyncio.run(main()) 
\ No newline at end of file
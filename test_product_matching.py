@@ -4,10 +4,13 @@ Test script for product ID extraction and matching
 """
 
 import re
-from urllib.parse import urlparse
+import asyncio
 from bargainbliss_ai_bot import generate_affiliate_link
 
-def test_product_extraction():
+# Domain and product ID of item URLs like https://he.aliexpress.com/item/1005007300955234.html
+_URL_RE = re.compile(r'https?://([^/]+)/(?:[^?]*?/)?item/(\d+)')
+
+async def test_product_extraction():
     print("🧪 Testing Product ID Extraction")
     print("=" * 50)
     
@@ -19,22 +22,26 @@ def test_product_extraction():
         "https://s.click.aliexpress.com/e/_opegQu9rmat"
     ]
     
-    for i, url in enumerate(test_urls, 1):
+    # Extract product IDs
+    matches = [_URL_RE.match(url) for url in test_urls]
+    
+    async def generate_if_matched(url, product_id_match):
+        return await generate_affiliate_link(url) if product_id_match else None
+    
+    # Link generation is network-bound, so run every matched URL at once
+    affiliate_links = await asyncio.gather(*(generate_if_matched(url, m) for url, m in zip(test_urls, matches)))
+    
+    for i, (url, product_id_match, affiliate_link) in enumerate(zip(test_urls, matches, affiliate_links), 1):
         print(f"\n{'='*20} Test {i} {'='*20}")
         print(f"URL: {url}")
         
-        # Extract product ID
-        parsed_url = urlparse(url)
-        product_id_match = re.search(r'/item/(\d+)', parsed_url.path)
-        
         if product_id_match:
-            product_id = product_id_match.group(1)
+            domain, product_id = product_id_match.groups()
             print(f"✅ Extracted Product ID: {product_id}")
-            print(f"✅ Domain: {parsed_url.netloc}")
+            print(f"✅ Domain: {domain}")
             
             # Test affiliate link generation
             print("🔄 Generating affiliate link...")
-            affiliate_link = generate_affiliate_link(url)
             
             if affiliate_link:
                 print(f"✅ Generated: {affiliate_link}")
@@ -51,4 +58,4 @@ def test_product_extraction():
             print("ℹ️ This might be a shortened link")
 
 if __name__ == "__main__":
-    test_product_extraction() 
\ No newline at end of file
+    asyncio.run(test_product_extraction()) 
\ No newline at end of file
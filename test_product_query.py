@@ -3,16 +3,17 @@
 Test if aliexpress.affiliate.product.query correctly finds specific products
 """
 
-import os
-import json
 import logging
 import time
 import hmac
 import hashlib
 import asyncio
 import re
-from dotenv import load_dotenv
+from _creds import get_creds
+from _aliexpress_sign import sign
+from _fastjson import loads as json_loads
 import aiohttp
+from typing import Optional
 
 # Configure logging
 logging.basicConfig(
@@ -21,12 +22,7 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Load environment variables
-load_dotenv()
-
-# Load credentials
-API_KEY = os.getenv('AFFILIATE_API_KEY') or os.getenv('ALIBABA_API_KEY') or os.getenv('ALIEXPRESS_API_KEY')
-SECRET_KEY = os.getenv('AFFILIATE_SECRET_KEY') or os.getenv('ALIBABA_SECRET_KEY') or os.getenv('ALIEXPRESS_SECRET_KEY')
+API_KEY, SECRET_KEY, _ = get_creds()
 TRACKING_ID = 'bargainbliss_ai_bot'
 
 class ProductQueryTester:
@@ -34,13 +30,34 @@ class ProductQueryTester:
         self.api_key = API_KEY
         self.secret_key = SECRET_KEY
         self.tracking_id = TRACKING_ID
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    def _get_session(self):
+        """Return the shared ClientSession, creating it on first use"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=20,
+                    limit_per_host=8,
+                    keepalive_timeout=60,
+                    ttl_dns_cache=300
+                ),
+                timeout=aiohttp.ClientTimeout(total=15)
+            )
+        return self._session
+
+    async def close(self):
+        """Close the shared ClientSession"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
 
     def generate_signature(self, params, secret, sign_method="sha256"):
         """Generate API signature"""
-        sorted_params = sorted(params.items())
-        sign_string = "".join(f"{k}{v}" for k, v in sorted_params)
-        hash_algorithm = hashlib.sha256 if sign_method.lower() == "sha256" else hashlib.md5
-        return hmac.new(secret.encode(), sign_string.encode(), hash_algorithm).hexdigest().upper()
+        if sign_method.lower() == "sha256":
+            return sign(params, secret)
+        sign_string = "".join(map("".join, sorted(params.items())))
+        return hmac.new(secret.encode(), sign_string.encode(), hashlib.md5).hexdigest().upper()
 
     async def aliexpress_api_request(self, params):
         """Make API request to AliExpress"""
@@ -59,19 +76,21 @@ class ProductQueryTester:
         params['sign'] = self.generate_signature(params, self.secret_key)
         
         logger.info(f"Making API request to: {api_url}")
-        logger.info(f"Parameters: {json.dumps(params, indent=2)}")
+        # Keys and signature prefix at INFO; the full dump is lazy and only built at DEBUG
+        logger.info("Parameters: %s (sign %s...)", list(params), params['sign'][:8])
+        logger.debug("Parameters: %s", params)
         
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(api_url, data=params, timeout=15) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        logger.info(f"Response Data: {json.dumps(data, indent=2)}")
-                        return data
-                    else:
-                        logger.error(f"HTTP Error: {response.status}")
-                        logger.error(f"Response: {await response.text()}")
-                        return None
+            async with self._get_session().post(api_url, data=params) as response:
+                if response.status == 200:
+                    data = await response.json(loads=json_loads)
+                    logger.info("Response keys: %s", list(data))
+                    logger.debug("Response Data: %s", data)
+                    return data
+                else:
+                    logger.error(f"HTTP Error: {response.status}")
+                    logger.error(f"Response: {await response.text()}")
+                    return None
         except Exception as e:
             logger.error(f"Error making API request: {e}")
             return None
@@ -142,7 +161,10 @@ async def main():
     logger.info(f"Using Tracking ID: {TRACKING_ID}")
     
     tester = ProductQueryTester()
-    result = await tester.test_product_query(test_product_id)
+    try:
+        result = await tester.test_product_query(test_product_id)
+    finally:
+        await tester.close()
     
     if result:
         logger.info("✅ Success! Product query returned correct product")
@@ -5,7 +5,9 @@ Test script to verify BargainBliss AI Bot setup
 
 import os
 import sys
+from importlib.util import find_spec
 from dotenv import load_dotenv
+from _creds import get_creds
 
 def test_environment():
     """Test if environment variables are properly set"""
@@ -21,13 +23,7 @@ def test_environment():
         return False
     
     # Check for affiliate credentials (support multiple naming conventions)
-    api_key = (os.getenv('AFFILIATE_API_KEY') or 
-               os.getenv('ALIBABA_API_KEY') or 
-               os.getenv('ALIEXPRESS_API_KEY'))
-    
-    secret_key = (os.getenv('AFFILIATE_SECRET_KEY') or 
-                  os.getenv('ALIBABA_SECRET_KEY') or 
-                  os.getenv('ALIEXPRESS_SECRET_KEY'))
+    api_key, secret_key, _ = get_creds()
     
     if not api_key:
         print("❌ Missing affiliate API key")
@@ -53,12 +49,8 @@ def test_dependencies():
         'dotenv'
     ]
     
-    missing_packages = []
-    for package in required_packages:
-        try:
-            __import__(package)
-        except ImportError:
-            missing_packages.append(package)
+    # find_spec only locates each package, without running its import-time code
+    missing_packages = [package for package in required_packages if find_spec(package) is None]
     
     if missing_packages:
         print(f"❌ Missing packages: {', '.join(missing_packages)}")
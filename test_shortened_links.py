@@ -4,13 +4,14 @@ Test script for shortened affiliate links
 """
 
 import os
+import asyncio
 from dotenv import load_dotenv
 from bargainbliss_ai_bot import is_valid_aliexpress_url, generate_affiliate_link
 
 # Load environment variables
 load_dotenv()
 
-def test_shortened_links():
+async def test_shortened_links():
     print("🧪 Testing Shortened Affiliate Links")
     print("=" * 50)
     
@@ -23,18 +24,23 @@ def test_shortened_links():
         "https://www.aliexpress.com/s/item/1234567890.html"
     ]
     
-    for i, url in enumerate(test_urls, 1):
+    # Test URL validation
+    valid = [is_valid_aliexpress_url(url) for url in test_urls]
+    
+    async def generate_if_valid(url, is_valid):
+        return await generate_affiliate_link(url) if is_valid else None
+    
+    # Link generation is network-bound, so run every valid URL at once
+    affiliate_links = await asyncio.gather(*(generate_if_valid(url, is_valid) for url, is_valid in zip(test_urls, valid)))
+    
+    for i, (url, is_valid, affiliate_link) in enumerate(zip(test_urls, valid, affiliate_links), 1):
         print(f"\n{'='*20} Test {i} {'='*20}")
         print(f"URL: {url}")
-        
-        # Test URL validation
-        is_valid = is_valid_aliexpress_url(url)
         print(f"✅ URL Valid: {is_valid}")
         
         if is_valid:
             # Test affiliate link generation
             print("🔄 Generating affiliate link...")
-            affiliate_link = generate_affiliate_link(url)
             
             if affiliate_link:
                 print(f"✅ Generated: {affiliate_link}")
@@ -44,4 +50,4 @@ def test_shortened_links():
             print("❌ URL not valid, skipping generation")
 
 if __name__ == "__main__":
-    test_shortened_links() 
\ No newline at end of file
+    asyncio.run(test_shortened_links()) 
\ No newline at end of file
@@ -3,31 +3,20 @@
 Test with user's specific product ID
 """
 
-import requests
+from urllib3.util.retry import Retry
 import time
-import hashlib
-import hmac
-import os
-from dotenv import load_dotenv
+from _creds import get_creds
+from _http import make_session
+from _aliexpress_sign import sign
+from _fastjson import loads as json_loads
 
-# Load environment variables
-load_dotenv()
+API_KEY, SECRET_KEY, TRACKING_ID = get_creds()
 
-# Get credentials
-API_KEY = os.getenv('ALIEXPRESS_API_KEY') or os.getenv('AFFILIATE_API_KEY')
-SECRET_KEY = os.getenv('ALIEXPRESS_SECRET_KEY') or os.getenv('AFFILIATE_SECRET_KEY')
-TRACKING_ID = os.getenv('TRACKING_ID', 'bargainbliss_ai_bot')
-
-def generate_hmac_signature_upper(params, secret_key):
-    """Generate HMAC-SHA256 signature in uppercase for AliExpress API"""
-    sorted_params = sorted(params.items())
-    param_string = ''.join([f"{k}{v}" for k, v in sorted_params])
-    signature = hmac.new(
-        secret_key.encode('utf-8'),
-        param_string.encode('utf-8'),
-        hashlib.sha256
-    ).hexdigest().upper()
-    return signature
+_SESSION = make_session(
+    pool_connections=4,
+    pool_maxsize=10,
+    max_retries=Retry(total=2, backoff_factor=0.2, status_forcelist=[502, 503, 504])
+)
 
 def test_specific_product():
     print("🔍 Testing User's Specific Product")
@@ -57,17 +46,18 @@ def test_specific_product():
         'source_values': 'telegram_bot'
     }
     
-    link_params['sign'] = generate_hmac_signature_upper(link_params, SECRET_KEY)
+    link_params['sign'] = sign(link_params, SECRET_KEY)
     
     print(f"\n🔄 Testing Direct Link Generation...")
     
     try:
-        response = requests.get(api_url, params=link_params, timeout=10)
+        response = _SESSION.get(api_url, params=link_params, timeout=10)
         print(f"Status Code: {response.status_code}")
-        print(f"Response: {response.text}")
+        # Decode only the bytes being printed rather than the whole body
+        print(f"Response: {response.content[:512].decode('utf-8', 'replace')}")
         
         if response.status_code == 200:
-            data = response.json()
+            data = json_loads(response.content)
             if 'error_response' in data:
                 print(f"❌ API Error: {data['error_response']}")
             elif 'aliexpress_affiliate_link_generate_response' in data:
@@ -10,17 +10,17 @@ from bargainbliss_ai_bot import generate_affiliate_link
 # Load environment variables
 load_dotenv()
 
+# User's specific product ID from their affiliate link
+TEST_URLS = (
+    "https://www.aliexpress.com/item/1005007300678312.html",  # User's product
+    "https://he.aliexpress.com/item/1005009632752847.html",   # Recent test
+)
+
 def test_specific_product():
     print("🔍 Testing Bot with User's Specific Product")
     print("=" * 50)
     
-    # User's specific product ID from their affiliate link
-    test_urls = [
-        "https://www.aliexpress.com/item/1005007300678312.html",  # User's product
-        "https://he.aliexpress.com/item/1005009632752847.html",   # Recent test
-    ]
-    
-    for i, product_url in enumerate(test_urls, 1):
+    for i, product_url in enumerate(TEST_URLS, 1):
         print(f"\n{'='*20} Test {i} {'='*20}")
         print(f"Product URL: {product_url}")
         
@@ -3,46 +3,30 @@
 Test the specific product issue
 """
 
-import requests
 import time
-import hashlib
-import hmac
-import os
-from dotenv import load_dotenv
+from _creds import get_creds
+from _http import make_session
+from _aliexpress_sign import sign
 
-# Load environment variables
-load_dotenv()
+API_KEY, SECRET_KEY, TRACKING_ID = get_creds()
 
-# Get credentials
-API_KEY = os.getenv('ALIEXPRESS_API_KEY') or os.getenv('AFFILIATE_API_KEY')
-SECRET_KEY = os.getenv('ALIEXPRESS_SECRET_KEY') or os.getenv('AFFILIATE_SECRET_KEY')
-TRACKING_ID = os.getenv('TRACKING_ID', 'bargainbliss_ai_bot')
-
-def generate_hmac_signature_upper(params, secret_key):
-    """Generate HMAC-SHA256 signature in uppercase"""
-    sorted_params = sorted(params.items())
-    param_string = ''.join([f"{k}{v}" for k, v in sorted_params])
-    signature = hmac.new(
-        secret_key.encode('utf-8'),
-        param_string.encode('utf-8'),
-        hashlib.sha256
-    ).hexdigest().upper()
-    return signature
+_SESSION = make_session(pool_connections=4, pool_maxsize=8)
 
 def test_specific_product_issue():
     print("🔍 Testing Specific Product Issue")
     print("=" * 50)
     
-    # The problematic product ID
-    product_id = "1005007500365472"
-    product_url = f"https://he.aliexpress.com/item/{product_id}.html"
+    # The problematic product IDs; add more here and they are all checked in one API call
+    product_ids = ["1005007500365472"]
+    requested = set(product_ids)
     
-    print(f"Product ID: {product_id}")
-    print(f"Product URL: {product_url}")
+    for product_id in product_ids:
+        print(f"Product ID: {product_id}")
+        print(f"Product URL: https://he.aliexpress.com/item/{product_id}.html")
     
     api_url = 'https://api-sg.aliexpress.com/sync'
     
-    # Test the API with this specific product
+    # Query all the products with one signed request
     query_params = {
         'app_key': API_KEY,
         'method': 'aliexpress.affiliate.product.query',
@@ -50,19 +34,20 @@ def test_specific_product_issue():
         'v': '2.0',
         'sign_method': 'sha256',
         'timestamp': time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime()),
-        'product_ids': product_id,
+        'product_ids': ','.join(product_ids),
         'tracking_id': TRACKING_ID,
         'page_no': '1',
-        'page_size': '1'
+        'page_size': str(len(product_ids))
     }
     
     # Generate HMAC-SHA256 signature in uppercase
-    query_params['sign'] = generate_hmac_signature_upper(query_params, SECRET_KEY)
+    query_params['sign'] = sign(query_params, SECRET_KEY)
     
     try:
-        response = requests.get(api_url, params=query_params, timeout=10)
+        response = _SESSION.get(api_url, params=query_params, timeout=10)
         print(f"Status Code: {response.status_code}")
-        print(f"Response: {response.text}")
+        # Only a preview is printed; decoding the whole body just for this would be wasted work
+        print(f"Response: {response.content[:2048].decode('utf-8', 'replace')}")
         
         if response.status_code == 200:
             data = response.json()
@@ -72,22 +57,28 @@ def test_specific_product_issue():
                 resp = data['aliexpress_affiliate_product_query_response']
                 if 'resp_result' in resp and 'result' in resp['resp_result']:
                     products = resp['resp_result']['result'].get('products', {}).get('product', [])
+                    if isinstance(products, dict):
+                        products = [products]
                     if products:
                         print(f"✅ Found {len(products)} products")
                         for i, product in enumerate(products, 1):
-                            product_id_in_result = product.get('product_id', '')
+                            product_id_in_result = str(product.get('product_id', ''))
                             promotion_link = product.get('promotion_link', '')
+                            matched = product_id_in_result in requested
                             print(f"\nProduct {i}:")
                             print(f"  Product ID in result: {product_id_in_result}")
-                            print(f"  Requested Product ID: {product_id}")
-                            print(f"  Match: {'✅' if str(product_id_in_result) == str(product_id) else '❌'}")
+                            print(f"  Requested Product IDs: {', '.join(product_ids)}")
+                            print(f"  Match: {'✅' if matched else '❌'}")
                             print(f"  Promotion Link: {promotion_link}")
                             
-                            # Check if it's the same product
-                            if str(product_id_in_result) == str(product_id):
+                            # Check if it's one of the requested products
+                            if matched:
                                 print(f"  ✅ CORRECT PRODUCT FOUND!")
+                                requested.discard(product_id_in_result)
                             else:
                                 print(f"  ❌ WRONG PRODUCT! API returned different product")
+                        if requested:
+                            print(f"\n⚠️ Not returned: {', '.join(sorted(requested))}")
                     else:
                         print(f"⚠️ No products found")
             else:
@@ -3,36 +3,53 @@
 Test Standard API methods that should work with current permissions
 """
 
-import requests
 import time
-import hashlib
-import os
-from dotenv import load_dotenv
+from concurrent.futures import ThreadPoolExecutor
+from _creds import get_creds
+from _http import make_session
+from _aliexpress_sign import md5_sign, sign
 
-# Load environment variables
-load_dotenv()
+API_KEY, SECRET_KEY, TRACKING_ID = get_creds()
 
-# Get credentials
-API_KEY = os.getenv('ALIEXPRESS_API_KEY') or os.getenv('AFFILIATE_API_KEY')
-SECRET_KEY = os.getenv('ALIEXPRESS_SECRET_KEY') or os.getenv('AFFILIATE_SECRET_KEY')
-TRACKING_ID = os.getenv('TRACKING_ID', 'bargainbliss_ai_bot')
+_SESSION = make_session(pool_connections=4, pool_maxsize=8)
 
-def generate_md5_signature(params, secret_key):
-    """Generate MD5 signature for AliExpress API"""
-    sorted_params = sorted(params.items())
-    param_string = ''.join([f"{k}{v}" for k, v in sorted_params])
-    param_string += secret_key
-    return hashlib.md5(param_string.encode('utf-8')).hexdigest()
+def _run_probe(config):
+    """Sign and send one API config, returning its report lines"""
+    lines = [f"API URL: {config['url']}", f"Method: {config['method']}"]
+    
+    params = config['params'].copy()
+    
+    # Generate signature based on method
+    if config['sign_method'] == 'hmac_sha256':
+        params['sign'] = sign(params, SECRET_KEY)
+    else:
+        params['sign'] = md5_sign(params, SECRET_KEY)
+    
+    try:
+        # Make GET request for sync API
+        response = _SESSION.get(config['url'], params=params, timeout=10)
+        lines.append(f"Status Code: {response.status_code}")
+        lines.append(f"Response: {response.content[:500].decode('utf-8', 'replace')}...")
+        
+        if response.status_code == 200:
+            data = response.json()
+            if 'error_response' in data:
+                lines.append(f"❌ API Error: {data['error_response']}")
+            else:
+                lines.append(f"✅ Success! Response structure: {list(data.keys())}")
+        else:
+            lines.append(f"❌ HTTP Error: {response.status_code}")
+            
+    except Exception as e:
+        lines.append(f"❌ Exception: {e}")
+    return lines
 
 def test_standard_api():
     print("🔍 Testing Standard API Methods")
     print("=" * 50)
     
-    # Test URLs
-    test_urls = [
-        "https://www.aliexpress.com/item/1005007300678312.html",  # User's product
-        "https://he.aliexpress.com/item/1005009632752847.html",   # Recent test
-    ]
+    # All the probes go out together, so one timestamp serves every config
+    timestamp = time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime())
     
     # Try different API endpoints and methods
     api_configs = [
@@ -46,7 +63,7 @@ def test_standard_api():
                 'format': 'json',
                 'v': '2.0',
                 'sign_method': 'sha256',
-                'timestamp': time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime()),
+                'timestamp': timestamp,
                 'keywords': 'phone',
                 'tracking_id': TRACKING_ID
             },
@@ -62,7 +79,7 @@ def test_standard_api():
                 'format': 'json',
                 'v': '2.0',
                 'sign_method': 'sha256',
-                'timestamp': time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime()),
+                'timestamp': timestamp,
                 'product_id': '1005007300678312',
                 'tracking_id': TRACKING_ID,
                 'source_url': 'https://www.aliexpress.com/item/1005007300678312.html',
@@ -73,44 +90,12 @@ def test_standard_api():
         }
     ]
     
-    for i, config in enumerate(api_configs, 1):
-        print(f"\n{'='*20} Test {i}: {config['name']} {'='*20}")
-        print(f"API URL: {config['url']}")
-        print(f"Method: {config['method']}")
-        
-        params = config['params'].copy()
-        
-        # Generate signature based on method
-        if config['sign_method'] == 'hmac_sha256':
-            import hmac
-            sorted_params = sorted(params.items())
-            param_string = ''.join([f"{k}{v}" for k, v in sorted_params])
-            signature = hmac.new(
-                SECRET_KEY.encode('utf-8'),
-                param_string.encode('utf-8'),
-                hashlib.sha256
-            ).hexdigest().upper()
-            params['sign'] = signature
-        else:
-            params['sign'] = generate_md5_signature(params, SECRET_KEY)
-        
-        try:
-            # Make GET request for sync API
-            response = requests.get(config['url'], params=params, timeout=10)
-            print(f"Status Code: {response.status_code}")
-            print(f"Response: {response.text[:500]}...")
-            
-            if response.status_code == 200:
-                data = response.json()
-                if 'error_response' in data:
-                    print(f"❌ API Error: {data['error_response']}")
-                else:
-                    print(f"✅ Success! Response structure: {list(data.keys())}")
-            else:
-                print(f"❌ HTTP Error: {response.status_code}")
-                
-        except Exception as e:
-            print(f"❌ Exception: {e}")
+    # The probes only wait on the network, so run them side by side and print in order
+    with ThreadPoolExecutor(max_workers=min(8, len(api_configs))) as executor:
+        results = executor.map(_run_probe, api_configs)
+        for i, (config, lines) in enumerate(zip(api_configs, results), 1):
+            print(f"\n{'='*20} Test {i}: {config['name']} {'='*20}")
+            print("\n".join(lines))
 
 if __name__ == "__main__":
     test_standard_api() 
\ No newline at end of file
@@ -3,34 +3,107 @@
 Web Interface for editing Telegram Bot messages
 """
 
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify
+from flask import Flask, render_template, request, redirect, url_for, flash
 import json
 import os
+import re
+from collections import namedtuple
+from markupsafe import Markup, escape
+from werkzeug.http import http_date
+from _fastjson import dumps as json_dumps
 from message_manager import MessageManager
 
-app = Flask(__name__)
+# No static files are served, so skip registering the /static route
+app = Flask(__name__, static_folder=None)
+# Match '/edit/x' and '/edit/x/' alike instead of redirecting (must be set before routes are added)
+app.url_map.strict_slashes = False
 app.secret_key = 'your-secret-key-here'  # Change this in production
 
 # Initialize message manager
 message_manager = MessageManager()
 
-@app.route('/')
+# Messages served to the routes, keyed on config.json's mtime so edits made outside
+# this process (e.g. edit_messages.py) are picked up without copying on every request.
+# Each refresh builds a new snapshot and publishes it with one assignment, so waitress
+# threads never see fields from two different refreshes.
+_MessagesSnapshot = namedtuple('_MessagesSnapshot', 'mtime data lower_items html_messages')
+_messages_snapshot = None
+
+def _config_mtime():
+    """Return config.json's mtime in ns, or None if it is missing"""
+    try:
+        return os.stat(message_manager.config_file).st_mtime_ns
+    except OSError:
+        return None
+
+# Telegram's HTML formatting tags, matched in already-escaped text so only these are let through
+_TELEGRAM_TAG_RE = re.compile(
+    r'&lt;(/?)(b|strong|i|em|u|ins|s|strike|del|code|pre)&gt;'
+    r'|&lt;a href=(&#34;|&#39;)(https?://[^\s]*?)\3&gt;'
+    r'|&lt;/a&gt;'
+)
+
+def _telegram_tag(match):
+    tag, href = match.group(2), match.group(4)
+    if tag:
+        return f'<{match.group(1)}{tag}>'
+    if href:
+        # href is still escaped, so it can't break out of the attribute
+        return f'<a href="{href}">'
+    return '</a>'
+
+def _preview_html(message):
+    """Render a message as the bot sends it: escaped, Telegram's tags kept, \n as <br>"""
+    html = _TELEGRAM_TAG_RE.sub(_telegram_tag, str(escape(message)))
+    return Markup(html.replace('\n', '<br>'))
+
+def _get_messages():
+    """Return the current messages snapshot; treat its contents as read-only"""
+    global _messages_snapshot
+    snapshot = _messages_snapshot
+    mtime = _config_mtime()
+    if snapshot is None or mtime != snapshot.mtime:
+        if snapshot is not None:
+            # Changed on disk by someone else
+            message_manager.reload_config()
+        data = message_manager.list_messages()
+        snapshot = _MessagesSnapshot(
+            mtime=mtime,
+            data=data,
+            # Lowercased once per change so /search doesn't re-lowercase every message per request
+            lower_items=tuple((k, k.lower(), m, m.lower()) for k, m in data.items()),
+            # Preview HTML, built here rather than on every /preview hit
+            html_messages={k: _preview_html(m) for k, m in data.items()},
+        )
+        _messages_snapshot = snapshot
+    return snapshot
+
+def _json_response(obj, status=200):
+    """Serialize obj with orjson when available instead of Flask's stdlib-based jsonify"""
+    return app.response_class(json_dumps(obj), status=status, mimetype='application/json')
+
+def _invalidate_messages():
+    """Drop the cached messages after this process changes them"""
+    global _messages_snapshot
+    _messages_snapshot = None
+
+@app.get('/')
 def index():
     """Main page showing all messages"""
-    messages = message_manager.list_messages()
+    messages = _get_messages().data
     return render_template('index.html', messages=messages)
 
-@app.route('/edit/<key>')
+@app.get('/edit/<key>')
 def edit_message(key):
     """Edit a specific message"""
-    messages = message_manager.list_messages()
+    messages = _get_messages().data
     if key not in messages:
         flash(f'Message key "{key}" not found!', 'error')
         return redirect(url_for('index'))
     
     return render_template('edit.html', key=key, message=messages[key])
 
-@app.route('/update/<key>', methods=['POST'])
+@app.post('/update/<key>')
 def update_message(key):
     """Update a message"""
     try:
@@ -40,7 +113,9 @@ def update_message(key):
             return redirect(url_for('edit_message', key=key))
         
         # Update the message
-        if message_manager.update_message(key, new_message):
+        updated = message_manager.update_message(key, new_message)
+        _invalidate_messages()
+        if updated:
             flash(f'Message "{key}" updated successfully!', 'success')
         else:
             flash(f'Failed to update message "{key}"!', 'error')
@@ -61,11 +136,13 @@ def add_message():
             flash('Both key and message are required!', 'error')
             return redirect(url_for('add_message'))
         
-        if key in message_manager.list_messages():
+        if key in _get_messages().data:
             flash(f'Message key "{key}" already exists!', 'error')
             return redirect(url_for('add_message'))
         
-        if message_manager.add_message(key, message):
+        added = message_manager.add_message(key, message)
+        _invalidate_messages()
+        if added:
             flash(f'Message "{key}" added successfully!', 'success')
             return redirect(url_for('index'))
         else:
@@ -73,11 +150,13 @@ def add_message():
     
     return render_template('add.html')
 
-@app.route('/delete/<key>', methods=['POST'])
+@app.post('/delete/<key>')
 def delete_message(key):
     """Delete a message"""
     try:
-        if message_manager.delete_message(key):
+        deleted = message_manager.delete_message(key)
+        _invalidate_messages()
+        if deleted:
             flash(f'Message "{key}" deleted successfully!', 'success')
         else:
             flash(f'Failed to delete message "{key}"!', 'error')
@@ -86,38 +165,43 @@ def delete_message(key):
     
     return redirect(url_for('index'))
 
-@app.route('/search')
+@app.get('/search')
 def search_messages():
     """Search messages"""
     query = request.args.get('q', '').strip()
     if not query:
         return redirect(url_for('index'))
     
-    messages = message_manager.list_messages()
-    results = {}
-    
-    for key, message in messages.items():
-        if query.lower() in key.lower() or query.lower() in message.lower():
-            results[key] = message
+    q = query.lower()
+    results = {k: m for k, kl, m, ml in _get_messages().lower_items if q in kl or q in ml}
     
     return render_template('search.html', results=results, query=query)
 
-@app.route('/preview/<key>')
+@app.get('/preview/<key>')
 def preview_message(key):
     """Preview a message with formatting"""
-    messages = message_manager.list_messages()
-    if key not in messages:
-        return jsonify({'error': 'Message not found'}), 404
+    snapshot = _get_messages()
+    if key not in snapshot.data:
+        return _json_response({'error': 'Message not found'}, 404)
     
-    message = messages[key]
-    # Convert \n to <br> for HTML display
-    html_message = message.replace('\n', '<br>')
+    # Let polling previews revalidate against config.json's mtime instead of re-downloading
+    headers = {}
+    mtime = snapshot.mtime
+    if mtime is not None:
+        # Last-Modified only has 1s resolution, so the ETag carries the exact mtime
+        headers = {'Last-Modified': http_date(mtime // 1_000_000_000), 'ETag': f'"{mtime}"'}
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match == headers['ETag'] or (
+                if_none_match is None and request.headers.get('If-Modified-Since') == headers['Last-Modified']):
+            return app.response_class(status=304, headers=headers)
     
-    return jsonify({
+    response = _json_response({
         'key': key,
-        'message': message,
-        'html_message': html_message
+        'message': snapshot.data[key],
+        'html_message': str(snapshot.html_messages[key])
     })
+    response.headers.update(headers)
+    return response
 
 if __name__ == '__main__':
     print("🌐 Starting Web Interface for Bot Message Editor...")
@@ -126,4 +210,10 @@ if __name__ == '__main__':
     print("⏹️  Press Ctrl+C to stop the server")
     print()
     
-    app.run(debug=True, host='0.0.0.0', port=5001) 
\ No newline at end of file
+    if os.getenv('FLASK_DEBUG') == '1':
+        # Werkzeug dev server with the debugger and auto-reloader
+        app.run(debug=True, host='0.0.0.0', port=5001)
+    else:
+        # Multi-threaded production WSGI server
+        from waitress import serve
+        serve(app, host='0.0.0.0', port=5001, threads=8) 
\ No newline at end of file